@@ -114,6 +114,8 @@ class Experiment:
             self.k.node_manager.reset_scaling_labels()
             self.k.node_manager.reset_state_labels()
             self.k.statefulset_manager.reset_taskmanagers()
+            # Shells opened on the jobmanager would otherwise outlive its pod
+            self.k.pod_manager.close_persistent_shells()
             self.k.pod_manager.delete_pods_by_label("app=flink,component=jobmanager", "flink")
             self.p.role_load_generators(self.config, tag="delete")
             self.p.reload_playbook("application/kafka", config=self.config)
@@ -122,8 +122,9 @@ class Scaling:
             )
             return 1
 
-        # Eval new_par from sum of new_tm_count
-        new_par = sum(self.k.statefulset_manager.get_count_of_taskmanagers().values())
+        # Eval new_par from the counts listed above, only tm_name changed since then
+        taskmanagers_count_dict[tm_name] = new_tm_count
+        new_par = sum(taskmanagers_count_dict.values())
         ret = self.__scale_and_wait(new_par)
         if ret == 1:
             self.__log.error("[SCALING] __scale_w_tm: Error scaling operator.")
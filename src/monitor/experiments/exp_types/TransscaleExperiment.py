@@ -78,7 +78,7 @@ class TransscaleExperiment(Experiment):
         self.k.deployment_manager.scale_deployment(
             "flink-taskmanager", replicas=0, namespace="flink"
         )
-        sleep(1)
+        self.k.deployment_manager.wait_for_replicas("flink-taskmanager", 0, namespace="flink")
         self.k.deployment_manager.scale_deployment(
             "flink-taskmanager", replicas=1, namespace="flink"
         )
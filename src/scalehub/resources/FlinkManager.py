@@ -13,156 +13,328 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import json
 import re
-from time import sleep
+import time
+
+import requests
+import urllib3
+from kubernetes.client.rest import ApiException
+from requests.adapters import HTTPAdapter
+from websocket import WebSocketException
 
 from src.scalehub.resources.KubernetesManager import KubernetesManager
 from src.utils.Config import Config
 from src.utils.Defaults import DefaultKeys as Key
 from src.utils.Logger import Logger
 
+# Flink job ids are 32 hex characters
+_JOB_ID_RE = re.compile(r"JobID\s+([a-f0-9]{32})")
+_JOB_LIST_RE = re.compile(r"\b[a-f0-9]{32}\b")
+# Line breaks in operator descriptions are dropped, ":" and spaces become "_"
+_BR_RE = re.compile(r"</?br/?>")
+_OP_TRANS = str.maketrans({":": "_", " ": "_"})
+
+# Keep-alive session shared by all REST calls to the jobmanager
+_SESSION = requests.Session()
+_SESSION.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=10))
+
 
 class FlinkManager:
+    # How long a /jobs/{id} response is reused before being fetched again
+    JOB_DETAILS_TTL_S = 1.0
+    # Job states from which a job never reaches RUNNING again
+    TERMINAL_JOB_STATES = frozenset({"FAILED", "CANCELED", "FINISHED"})
+    # Seconds to wait for a triggered stop-with-savepoint to complete
+    SAVEPOINT_TIMEOUT_S = 90
+
     def __init__(self, log: Logger, config: Config, km: KubernetesManager):
         self.__log = log
         self.config = config
         self.k = km
         self.flink_host = "flink-jobmanager.flink.svc.cluster.local"
         self.flink_port = 8081
+        self.flink_url = f"http://{self.flink_host}:{self.flink_port}"
 
         # Store running job information
         self.monitored_task = self.config.get_str(Key.Experiment.task_name.key)
         self.job_file = self.config.get_str(Key.Experiment.job_file.key)
+        self.__job_cmd_prefix = f"flink run -d -j /tmp/jobs/{self.job_file}"
         self.job_plan = None
         self.job_id = None
+        self.__job_details = (None, 0.0, None)
+        # Operator name -> {"id": vertex id, "parallelism": parallelism}
         self.operators = {}
+        # Every operator whose name contains monitored_task, all of them are rescaled together
+        self.__monitored_operators = frozenset()
+        self.__par_map_template = []
         self.monitored_task_parallelism = None
         self.savepoint_path = None
+        # Last savepoint taken by this manager and its monotonic timestamp. Rescales issued within
+        # the reuse window restart from it instead of triggering a new savepoint, as long as the
+        # running job was restored from it and has made no progress since.
+        self.__last_savepoint = (None, 0.0)
+        # Savepoint the running job was restored from, None for a fresh start
+        self.__restored_from = None
+        self.savepoint_reuse_window_s = self.config.get_int(
+            Key.Experiment.Flink.savepoint_reuse_window_s.key,
+            Key.Experiment.Flink.savepoint_reuse_window_s.default_value,
+        )
 
     def __get_overview(self):
         try:
-            import requests
-
-            r = requests.get(f"http://{self.flink_host}:{self.flink_port}/overview")
+            r = _SESSION.get(f"{self.flink_url}/overview")
             if r.status_code == 200:
                 return r.json()
             return None
-        except Exception as e:
+        except (requests.RequestException, ValueError) as e:
             self.__log.error(f"[FLK_MGR] Error while getting overview: {str(e)}")
             return None
 
     def __get_job_plan(self, job_id):
         try:
-            import requests
-
             retry = 3
             while retry > 0:
-                r = requests.get(
-                    f"http://flink-jobmanager.flink.svc.cluster.local:8081/jobs/{job_id}/plan"
-                )
+                r = _SESSION.get(f"{self.flink_url}/jobs/{job_id}/plan")
                 if r.status_code == 200:
-                    self.__log.info(f"[FLK_MGR] Job plan response: {r.text}")
-                    return r.json()
+                    # Decode the body once, the full plan is only logged on debug
+                    job_plan = r.json()
+                    self.__log.debug(f"[FLK_MGR] Job plan response: {job_plan}")
+                    return job_plan
                 retry -= 1
-                sleep(3)
+                time.sleep(3)
             return None
-        except Exception as e:
+        except (requests.RequestException, ValueError) as e:
             self.__log.error(f"[FLK_MGR] Error while getting job plan: {str(e)}")
             return None
 
+    def __get_job_details(self):
+        # /jobs/{id} carries both the job state and its plan. Cache it briefly so that reads issued
+        # back to back share a single request.
+        job_id, fetched_at, details = self.__job_details
+        if job_id == self.job_id and time.monotonic() - fetched_at < self.JOB_DETAILS_TTL_S:
+            return details
+        try:
+            r = _SESSION.get(f"{self.flink_url}/jobs/{self.job_id}")
+            if r.status_code == 200:
+                details = r.json()
+                self.__job_details = (self.job_id, time.monotonic(), details)
+                return details
+            return None
+        except (requests.RequestException, ValueError) as e:
+            self.__log.error(f"[FLK_MGR] Error while getting job details: {str(e)}")
+            return None
+
     def __get_job_state(self):
         # retrieve status of the job
-        try:
-            import requests
+        details = self.__get_job_details()
+        if details is None:
+            return None
+        return details.get("state")
+
+    def __poll(self, fetch, done, deadline_s=15, cap=1.0):
+        # Call fetch until done accepts its result, backing off from 100ms up to cap seconds.
+        # Returns None once deadline_s is exceeded.
+        deadline = time.monotonic() + deadline_s
+        interval = 0.1
+        while True:
+            result = fetch()
+            if done(result):
+                return result
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(interval)
+            interval = min(interval * 2, cap)
+
+    def __wait_for_job_stopped(self):
+        # Wait for the stopped job to leave the cluster so that the next submission finds its
+        # slots free
+        if (
+            self.__poll(self.__get_job_state, lambda state: state in ("FINISHED", "CANCELED"))
+            is None
+        ):
+            self.__log.warning(f"[FLK_MGR] Job {self.job_id} did not stop in time.")
+            return 1
+        if (
+            self.__poll(self.__get_overview, lambda o: o is not None and o["jobs-running"] == 0)
+            is None
+        ):
+            self.__log.warning("[FLK_MGR] Jobs are still running on the cluster.")
+            return 1
+        return 0
 
-            r = requests.get(
-                f"http://flink-jobmanager.flink.svc.cluster.local:8081/jobs/{self.job_id}/status"
-            )
+    def __get_root_exception(self):
+        try:
+            r = _SESSION.get(f"{self.flink_url}/jobs/{self.job_id}/exceptions")
             if r.status_code == 200:
-                return r.json()["status"]
-            else:
-                return None
-        except Exception as e:
-            self.__log.error(f"[FLK_MGR] Error while getting job state: {str(e)}")
+                return r.json().get("root-exception")
+            return None
+        except (requests.RequestException, ValueError) as e:
+            self.__log.error(f"[FLK_MGR] Error while getting job exceptions: {str(e)}")
             return None
 
     def __get_operators(self):
-        # Build dictionary with operator names as keys and parallelism as values
+        # Build dictionary with normalized operator names as keys, the vertex id is kept alongside
+        # the parallelism
         try:
-            operator_names = {}
-            for node in self.job_plan["plan"]["nodes"]:
-                operator_name = (
-                    node["description"]
-                    .replace("</br>", "")
-                    .replace("<br/>", "")
-                    .replace(":", "_")
-                    .replace(" ", "_")
-                )
-                operator_names[operator_name] = node["parallelism"]
-            return operator_names
-        except Exception as e:
+            return {
+                _BR_RE.sub("", node["description"]).translate(_OP_TRANS): {
+                    "id": node["id"],
+                    "parallelism": node["parallelism"],
+                }
+                for node in self.job_plan["plan"]["nodes"]
+            }
+        except (KeyError, TypeError) as e:
             self.__log.error(f"[FLK_MGR] Error while getting operator names: {str(e)}")
             return None
 
+    def __set_operators(self, operators):
+        # Resolve the monitored operators and the "name:" par map prefixes once per plan instead of
+        # on every rescale
+        self.operators = operators
+        self.__monitored_operators = frozenset(
+            operator for operator in operators if self.monitored_task in operator
+        )
+        self.__par_map_template = [(f"{operator}:", operator) for operator in operators]
+
     def __get_monitored_task_parallelism(self):
         self.__log.info(f"[FLK_MGR] Current operator names: {self.operators.keys()}")
-        for operator in self.operators:
-            if self.monitored_task in operator:
-                return self.operators[operator]
+        # The first monitored operator in plan order, they share the same parallelism
+        operator = next((op for op in self.operators if op in self.__monitored_operators), None)
+        if operator is None:
+            return None
+        return self.operators[operator]["parallelism"]
+
+    def __get_savepoint(self, trigger_id):
+        r = _SESSION.get(f"{self.flink_url}/jobs/{self.job_id}/savepoints/{trigger_id}")
+        if r.status_code == 200:
+            return r.json()
+        return None
 
     def __stop_job(self):
         try:
             if self.job_id is None:
                 self.__log.error("[FLK_MGR] Job id not found.")
                 return None
-            else:
-                retries = 10
-                savepoint_path = None
-                sleep_time = 3
-                while retries > 0 and savepoint_path is None:
-
-                    # Check if job has failed
-                    job_state = self.__get_job_state()
-                    if job_state == "FAILED":
-                        self.__log.error("[FLK_MGR] Job failed.")
-                        return None
-
-                    resp = self.k.pod_manager.execute_command_on_pod(
-                        deployment_name="flink-jobmanager",
-                        command=f"flink stop -p -d {self.job_id}",
-                    )
-                    for line in resp.split("\n"):
-                        if "Savepoint completed." in line:
-                            savepoint_path = line.split("Path:")[1].strip()
-                            self.__log.info(f"[FLK_MGR] Savepoint path: {savepoint_path}")
-                            return savepoint_path
-                    retries -= 1
-                    # At each iteration increase sleep time
-                    sleep_time += 1
-                    sleep(sleep_time)
-                if savepoint_path is None:
-                    self.__log.error("[FLK_MGR] Savepoint failed.")
-                return savepoint_path
-        except Exception as e:
+
+            # Trigger stop-with-savepoint once, retries only poll the status of that trigger
+            r = _SESSION.post(f"{self.flink_url}/jobs/{self.job_id}/stop", json={"drain": True})
+            if r.status_code != 202:
+                self.__log.error(f"[FLK_MGR] Savepoint trigger rejected: {r.text}")
+                return None
+            trigger_id = r.json()["request-id"]
+
+            def progress():
+                job_state = self.__get_job_state()
+                if job_state == "FAILED":
+                    return job_state, None
+                return job_state, self.__get_savepoint(trigger_id)
+
+            # Poll the status of that trigger with a short backoff, stopping early if the job fails
+            job_state, savepoint = self.__poll(
+                progress,
+                lambda result: result[0] == "FAILED"
+                or (result[1] is not None and result[1]["status"]["id"] == "COMPLETED"),
+                deadline_s=self.SAVEPOINT_TIMEOUT_S,
+            ) or (None, None)
+            if job_state == "FAILED":
+                self.__log.error("[FLK_MGR] Job failed.")
+                return None
+            if savepoint is None:
+                self.__log.error("[FLK_MGR] Savepoint failed.")
+                return None
+
+            operation = savepoint["operation"]
+            if "failure-cause" in operation:
+                self.__log.error(f"[FLK_MGR] Savepoint failed: {operation['failure-cause']}")
+                return None
+            savepoint_path = operation["location"]
+            self.__log.info(f"[FLK_MGR] Savepoint path: {savepoint_path}")
+            self.__wait_for_job_stopped()
+            return savepoint_path
+        except (requests.RequestException, ValueError, KeyError) as e:
             self.__log.error(f"[FLK_MGR] Error while stopping job: {str(e)}")
             return None
 
-    def __build_par_map(self, new_parallelism) -> str:
+    def __cancel_job(self):
+        res = self.k.pod_manager.execute_command_on_pod(
+            deployment_name="flink-jobmanager",
+            command=f"flink cancel {self.job_id}",
+            persistent=True,
+        )
+        self.__log.info(f"[FLK_MGR] Job cancel response: {res}")
+
+    def __get_source_records(self):
+        # Records emitted by the source vertices of the running job since it started, None if the
+        # job details or plan are not available
+        details = self.__get_job_details()
+        if details is None or self.job_plan is None:
+            return None
+        try:
+            sources = {
+                node["id"] for node in self.job_plan["plan"]["nodes"] if not node.get("inputs")
+            }
+            return sum(
+                vertex["metrics"]["write-records"]
+                for vertex in details["vertices"]
+                if vertex["id"] in sources
+            )
+        except (KeyError, TypeError) as e:
+            self.__log.error(f"[FLK_MGR] Error while reading source records: {str(e)}")
+            return None
 
-        for operator in self.operators:
-            if self.monitored_task in operator:
-                self.operators[operator] = new_parallelism
+    def __can_reuse_savepoint(self):
+        last_savepoint_path, last_savepoint_ts = self.__last_savepoint
+        if (
+            last_savepoint_path is None
+            or last_savepoint_path != self.__restored_from
+            or time.monotonic() - last_savepoint_ts >= self.savepoint_reuse_window_s
+        ):
+            return False
+        # Restarting from the savepoint drops everything processed since the job was restored
+        # from it, which would skew the experiment metrics. Only reuse it before any progress.
+        source_records = self.__get_source_records()
+        if source_records != 0:
+            self.__log.info(
+                f"[FLK_MGR] Job progressed since {last_savepoint_path} "
+                f"({source_records} source records), taking a new savepoint."
+            )
+            return False
+        return True
+
+    def __get_rescale_savepoint(self):
+        if self.__can_reuse_savepoint():
+            last_savepoint_path = self.__last_savepoint[0]
+            # A savepoint was taken recently, cancelling is much cheaper than stopping the job
+            self.__log.info(f"[FLK_MGR] Reusing recent savepoint: {last_savepoint_path}")
+            self.__cancel_job()
+            self.__wait_for_job_stopped()
+            return last_savepoint_path
+
+        savepoint_path = self.__stop_job()
+        if savepoint_path is not None:
+            self.__last_savepoint = (savepoint_path, time.monotonic())
+        return savepoint_path
 
-        # Join "operator:parallelism" pairs with ";"
-        operators_list = [f"{operator}:{self.operators[operator]}" for operator in self.operators]
-        return ";".join(operators_list)
+    def __build_par_map(self, new_parallelism) -> str:
+        # Join "operator:parallelism" pairs with ";", self.operators is left untouched until the
+        # rescaled job is actually submitted
+        return ";".join(
+            prefix
+            + str(
+                new_parallelism
+                if operator in self.__monitored_operators
+                else self.operators[operator]["parallelism"]
+            )
+            for prefix, operator in self.__par_map_template
+        )
 
     def run_job(self, new_parallelism=None, start_par=None):
         try:
             self.__log.info("[FLK_MGR] Running job.")
             if new_parallelism is not None:
                 self.__log.info(f"[FLK_MGR] Rescaling job to {new_parallelism}.")
-                savepoint_path = self.__stop_job()
+                savepoint_path = self.__get_rescale_savepoint()
                 if savepoint_path is not None:
                     self.savepoint_path = savepoint_path
                     self.__log.info(f"[FLK_MGR] Savepoint path: {self.savepoint_path}")
@@ -179,6 +351,7 @@ class FlinkManager:
                 res = self.k.pod_manager.execute_command_on_pod(
                     deployment_name="flink-jobmanager",
                     command=f"flink run -d -s {self.savepoint_path} -j /tmp/jobs/{self.job_file} --parmap '{par_map}'",
+                    persistent=True,
                 )
                 self.__log.info(
                     f"[FLK_MGR] Operator {self.monitored_task} rescaled to {new_parallelism}."
@@ -187,24 +360,38 @@ class FlinkManager:
                 self.__log.info(f"[FLK_MGR] Starting job with {start_par} parallelism.")
                 res = self.k.pod_manager.execute_command_on_pod(
                     deployment_name="flink-jobmanager",
-                    command=f"flink run -d -j /tmp/jobs/{self.job_file} --start_par {start_par}",
+                    command=f"{self.__job_cmd_prefix} --start_par {start_par}",
+                    persistent=True,
                 )
             else:
                 # Simply run the job
                 res = self.k.pod_manager.execute_command_on_pod(
                     deployment_name="flink-jobmanager",
-                    command=f"flink run -d -j /tmp/jobs/{self.job_file}",
+                    command=self.__job_cmd_prefix,
+                    persistent=True,
                 )
 
             self.__log.info(f"[FLK_MGR] Job run response: {res}")
             # Extract job id from response
-            self.job_id = re.search(r"JobID ([a-f0-9]+)", res).group(1)
-            if self.job_id:
-                self.__log.info(f"[FLK_MGR] Running job id: {self.job_id}")
-            else:  # Job id not found
+            match = _JOB_ID_RE.search(res or "")
+            if match is None:  # Job id not found
                 self.__log.error("[FLK_MGR] Job id not found.")
                 return 1
-        except Exception as e:
+            self.job_id = match.group(1)
+            self.__log.info(f"[FLK_MGR] Running job id: {self.job_id}")
+            self.__restored_from = self.savepoint_path if new_parallelism is not None else None
+            if new_parallelism is not None:
+                for operator in self.__monitored_operators:
+                    self.operators[operator]["parallelism"] = new_parallelism
+        except (
+            ApiException,
+            WebSocketException,
+            urllib3.exceptions.HTTPError,
+            OSError,
+            ValueError,
+        ) as e:
+            # Raised by the exec call on the jobmanager, by its websocket or by the API client once
+            # its retries or timeouts run out
             self.__log.error(f"[FLK_MGR] Error while running job: {str(e)}")
             return 1
 
@@ -222,15 +409,19 @@ class FlinkManager:
 
     def check_nominal_job_run(self):
         # List current running jobs. If we multiple jobs running beside self.job_id. Cancel all of them
-        res = self.k.pod_manager.execute_command_on_pod(
-            deployment_name="flink-jobmanager",
-            command="flink list -r 2>/dev/null",
+        res = (
+            self.k.pod_manager.execute_command_on_pod(
+                deployment_name="flink-jobmanager",
+                command="flink list -r 2>/dev/null",
+                persistent=True,
+            )
+            or ""
         ).strip()
 
         self.__log.info(f"[FLK_MGR] Running jobs: {res}")
 
         # Extract job ids from response
-        job_ids = re.findall(r"\b\w{16,}\b", res)
+        job_ids = _JOB_LIST_RE.findall(res)
 
         self.__log.info(f"[FLK_MGR] Running jobs: {job_ids}")
         deletions = 0
@@ -240,10 +431,11 @@ class FlinkManager:
                 res = self.k.pod_manager.execute_command_on_pod(
                     deployment_name="flink-jobmanager",
                     command=f"flink cancel {job_id}",
+                    persistent=True,
                 )
 
                 # Check content of res
-                if "Job not found" in res:
+                if res is None or "Job not found" in res:
                     self.__log.info(f"[FLK_MGR] Job {job_id} not found.")
                 else:
                     self.__log.info(f"[FLK_MGR] Job {job_id} cancelled.")
@@ -253,37 +445,43 @@ class FlinkManager:
         return 0
 
     def get_job_info(self):
-        try:
-            self.__log.info("[FLK_MGR] Getting job info.")
-            if self.job_id is None:
-                self.__log.error("[FLK_MGR] Job id not found.")
+        self.__log.info("[FLK_MGR] Getting job info.")
+        if self.job_id is None:
+            self.__log.error("[FLK_MGR] Job id not found.")
+            return None
+        details = self.__get_job_details()
+        if details is not None and "plan" in details:
+            plan = details["plan"]
+            try:
+                # Some Flink versions embed the plan as a JSON string
+                self.job_plan = {"plan": json.loads(plan) if isinstance(plan, str) else plan}
+            except ValueError as e:
+                self.__log.error(f"[FLK_MGR] Error while decoding job plan: {str(e)}")
                 return None
+        else:
             self.job_plan = self.__get_job_plan(self.job_id)
-            self.operators = self.__get_operators()
-            self.monitored_task_parallelism = self.__get_monitored_task_parallelism()
-
-            if self.operators is None:
-                self.__log.error("[FLK_MGR] Operator names not found.")
-                return None
-            else:
-                return 0
-        except Exception as e:
-            self.__log.error(f"[FLK_MGR] Error while getting job info: {str(e)}")
+        operators = self.__get_operators()
+        if operators is None:
+            self.__log.error("[FLK_MGR] Operator names not found.")
             return None
+        self.__set_operators(operators)
+        self.monitored_task_parallelism = self.__get_monitored_task_parallelism()
+        return 0
 
     def wait_for_job_running(self):
-        job_state = None
-        try:
-            retries = 15
-            while retries > 0 and job_state != "RUNNING":
-                job_state = self.__get_job_state()
-                if job_state == "RUNNING":
-                    return 0
-                retries -= 1
-                sleep(3)
-            if job_state != "RUNNING":
-                self.__log.error("[FLK_MGR] Job did not start.")
+        # Errors are handled by __get_job_state, the loop only counts retries
+        retries = 15
+        while retries > 0:
+            job_state = self.__get_job_state()
+            if job_state == "RUNNING":
+                return 0
+            if job_state in self.TERMINAL_JOB_STATES:
+                self.__log.error(
+                    f"[FLK_MGR] Job reached state {job_state} before running: "
+                    f"{self.__get_root_exception()}"
+                )
                 return 1
-        except Exception as e:
-            self.__log.error(f"[FLK_MGR] Error while waiting for job to run: {str(e)}")
-            return 1
+            retries -= 1
+            time.sleep(3)
+        self.__log.error("[FLK_MGR] Job did not start.")
+        return 1
@@ -13,116 +13,459 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import base64
+import codecs
+import io
+import json
 import os
-from time import sleep
+import threading
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from time import monotonic, sleep
 from typing import Any
 
 import yaml
-from kubernetes import config as kubeconfig, client as client
-from kubernetes.client.api import core_v1_api
+from kubernetes import config as kubeconfig, client as client, watch
 from kubernetes.client.rest import ApiException
 from kubernetes.stream import stream
+from urllib3.util.retry import Retry
+from websocket import WebSocketException
 
 from src.utils.Logger import Logger
-from src.utils.Tools import Tools
+from src.utils.Tools import Tools, YAML_LOADER
+
+# Upper bound on concurrent requests a single call fans out to the API server
+FAN_OUT_WORKERS = 16
+
+
+def _fan_out(fn, items):
+    # Apply fn to every item concurrently, results keep the order of items and the first
+    # exception raised by fn is re-raised
+    if not items:
+        return []
+    with ThreadPoolExecutor(max_workers=min(FAN_OUT_WORKERS, len(items))) as executor:
+        return list(executor.map(fn, items))
+
+
+# (connect, read) timeout in seconds of single API calls, so that a stalled connection to the API
+# server fails the call instead of blocking it forever. Watches are bounded by timeout_seconds, pod
+# execs run commands of any length and are left unbounded.
+API_TIMEOUT = (3, 30)
+
+# Page size of list calls that may return many objects
+LIST_PAGE_SIZE = 500
+
+
+def _paged_list(list_fn, *args, **kwargs):
+    # Yield the items of a list call one page at a time, following the continue tokens
+    _continue = None
+    while True:
+        page = list_fn(
+            *args, limit=LIST_PAGE_SIZE, _continue=_continue, _request_timeout=API_TIMEOUT, **kwargs
+        )
+        yield from page.items
+        _continue = page.metadata._continue
+        if not _continue:
+            return
+
+
+def _cached_get(list_fn, name, namespace):
+    # Single object read served from the API server watch cache (resourceVersion="0") instead of
+    # a quorum read from etcd. Only used where slightly stale data is acceptable.
+    items = list_fn(
+        namespace,
+        field_selector=f"metadata.name={name}",
+        resource_version="0",
+        _request_timeout=API_TIMEOUT,
+    ).items
+    if not items:
+        raise ApiException(status=404, reason=f"{name} not found in namespace {namespace}")
+    return items[0]
+
+
+LOG_CHUNK_SIZE = 1024
+
+# Field manager recorded by the API server for server-side applied objects
+FIELD_MANAGER = "scalehub"
+
+# Seconds a ConfigMap or Secret read is served from memory before being read again
+CONFIG_READ_TTL_S = 60
+
+
+def _read_pod_log(api_instance, name, namespace, **kwargs):
+    # Stream the raw response instead of letting the client materialize and deserialize it whole
+    # The read timeout bounds the wait for each chunk, not the whole log
+    resp = api_instance.read_namespaced_pod_log(
+        name, namespace, _preload_content=False, _request_timeout=API_TIMEOUT, **kwargs
+    )
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    buffer = io.StringIO()
+    try:
+        for chunk in resp.stream(LOG_CHUNK_SIZE):
+            buffer.write(decoder.decode(chunk))
+        buffer.write(decoder.decode(b"", final=True))
+    finally:
+        resp.release_conn()
+    return buffer.getvalue()
+
+
+def _read_pod_logs(api_instance, pods, namespace, **kwargs):
+    return _fan_out(
+        lambda pod: _read_pod_log(api_instance, pod.metadata.name, namespace, **kwargs),
+        pods,
+    )
 
 
 class KubernetesManager:
     def __init__(self, log: Logger):
         self.__log = log
-        try:
-            self.kubeconfig = kubeconfig.load_kube_config(os.environ["KUBECONFIG"])
-        except Exception as e:
-            self.__log.warning(f"Error loading kubeconfig from ENV: {str(e)}")
-            self.__log.warning("Trying incluster config instead.")
+        self.kubeconfig = None
+        self.__load_kubeconfig()
+
+        # Single pooled client shared by all managers for REST calls and watches, instead of one
+        # small urllib3 pool per API. The pool leaves room for several concurrent fan-outs. Pod
+        # execs are not thread-safe on a shared client and run on clients of their own.
+        configuration = client.Configuration.get_default_copy()
+        configuration.connection_pool_maxsize = max(4 * FAN_OUT_WORKERS, (os.cpu_count() or 1) * 5)
+        # Probe idle pooled connections and long-running watches with TCP keepalive, so that
+        # connections dropped by the network are detected instead of stalling a request
+        configuration.keep_alive = True
+        # Retry failed connections and 5xx answers with backoff. urllib3 only re-sends idempotent
+        # methods, and the last 5xx answer is returned so that it surfaces as an ApiException.
+        configuration.retries = Retry(
+            total=3,
+            backoff_factor=0.2,
+            status_forcelist=(500, 502, 503, 504),
+            raise_on_status=False,
+        )
+        self.api_client = client.ApiClient(configuration)
+        # The client only decodes JSON, so large list responses are compressed on the wire instead
+        # of switching to protobuf. urllib3 decompresses them transparently.
+        self.api_client.set_default_header("Accept-Encoding", "gzip")
+        self.__core_api = client.CoreV1Api(self.api_client)
+        # (kind, namespace, name) -> (read time, data) for ConfigMaps and Secrets
+        self.__config_reads = {}
+
+        self.pod_manager = PodManager(log, self.api_client)
+        self.deployment_manager = DeploymentManager(log, self.api_client)
+        self.service_manager = ServiceManager(log, self.api_client)
+        self.job_manager = JobManager(log, self.api_client)
+        self.node_manager = NodeManager(log, self.api_client)
+        self.statefulset_manager = StatefulSetManager(log, self.api_client)
+        # self.chaos_manager = ChaosManager(log)
+
+    def __load_kubeconfig(self):
+        # Only try the sources that are actually available: a KUBECONFIG file, then the service
+        # account mounted in cluster pods
+        kubeconfig_path = os.environ.get("KUBECONFIG")
+        if kubeconfig_path:
             try:
-                self.kubeconfig = kubeconfig.load_incluster_config()
+                self.kubeconfig = kubeconfig.load_kube_config(kubeconfig_path)
+                return
             except Exception as e:
-                self.__log.error(f"Error loading incluster kubeconfig: {str(e)}")
-                self.__log.error("Could not find a valid kubeconfig. Exiting.")
-
-        self.pod_manager = PodManager(log)
-        self.deployment_manager = DeploymentManager(log)
-        self.service_manager = ServiceManager(log)
-        self.job_manager = JobManager(log)
-        self.node_manager = NodeManager(log)
-        self.statefulset_manager = StatefulSetManager(log)
-        # self.chaos_manager = ChaosManager(log)
+                self.__log.warning(f"Error loading kubeconfig from {kubeconfig_path}: {str(e)}")
 
-    def get_configmap(self, configmap_name, namespace="default"):
-        # Create a Kubernetes API client
-        api_instance = client.CoreV1Api()
+        if not os.environ.get("KUBERNETES_SERVICE_HOST"):
+            self.__log.error(
+                "Could not find a valid kubeconfig: KUBECONFIG is not usable and not running in a cluster."
+            )
+            return
+        try:
+            self.kubeconfig = kubeconfig.load_incluster_config()
+        except Exception as e:
+            self.__log.error(f"Error loading incluster kubeconfig: {str(e)}")
+            self.__log.error("Could not find a valid kubeconfig. Exiting.")
+
+    def __cached_read(self, kind, namespace, name, read):
+        # ConfigMaps and Secrets rarely change, repeated reads within the TTL are served from memory
+        key = (kind, namespace, name)
+        cached = self.__config_reads.get(key)
+        if cached is not None and monotonic() - cached[0] < CONFIG_READ_TTL_S:
+            return cached[1]
+        data = read()
+        self.__config_reads[key] = (monotonic(), data)
+        return data
 
+    def get_configmap(self, configmap_name, namespace="default"):
         # Get the configmap
         try:
-            configmap = api_instance.read_namespaced_config_map(
-                name=configmap_name, namespace=namespace
+            return self.__cached_read(
+                "ConfigMap",
+                namespace,
+                configmap_name,
+                lambda: self.__core_api.read_namespaced_config_map(
+                    name=configmap_name, namespace=namespace, _request_timeout=API_TIMEOUT
+                ).data,
             )
-            return configmap.data
         except ApiException as e:
             self.__log.error(f"Exception when getting Job logs: {str(e)}")
 
     # get_token(secret_name, namespace)
     def get_token(self, secret_name, namespace):
-        import base64
-
         try:
-            core_v1 = core_v1_api.CoreV1Api()
-            secret = core_v1.read_namespaced_secret(secret_name, namespace)
-            token = secret.data["token"]
+            secret_data = self.__cached_read(
+                "Secret",
+                namespace,
+                secret_name,
+                lambda: self.__core_api.read_namespaced_secret(
+                    secret_name, namespace, _request_timeout=API_TIMEOUT
+                ).data,
+            )
+            token = secret_data["token"]
         except ApiException as e:
             self.__log.error(f"Exception when calling CoreV1Api->read_namespaced_secret: {str(e)}")
             return None
 
         # decode token from base64
-        return base64.b64decode(token).decode("utf-8")
+        # Service account tokens are JWTs, which are plain ASCII
+        return base64.b64decode(token).decode("ascii")
 
 
 class PodManager:
-    def __init__(self, log: Logger):
+    def __init__(self, log: Logger, api_client: client.ApiClient = None):
         self.__log = log
-        self.api_instance = client.CoreV1Api()
+        self.api_instance = client.CoreV1Api(api_client)
+        self.apps_api = client.AppsV1Api(api_client)
+        # Execs run on clients of their own built from the shared configuration, see __stream_exec
+        self.__exec_configuration = self.api_instance.api_client.configuration
+        # Long-lived shells opened by execute_command_on_pod(persistent=True), keyed by deployment
+        self.__shells = {}
+        # Deployment name -> (namespace, pod label selector), resolved once per deployment
+        self.__pod_selectors = {}
+        # Deployment name -> pod last used as exec target. Entries are dropped when an exec or a
+        # shell on that pod fails, the next call then looks the pod up again.
+        self.__target_pods = {}
+
+    def __get_pod_selector(self, deployment_name):
+        if deployment_name not in self.__pod_selectors:
+            deployments = self.apps_api.list_deployment_for_all_namespaces(
+                field_selector=f"metadata.name={deployment_name}", _request_timeout=API_TIMEOUT
+            )
+            if not deployments.items:
+                return None
+            deployment = deployments.items[0]
+            labels = deployment.spec.selector.match_labels or {}
+            self.__pod_selectors[deployment_name] = (
+                deployment.metadata.namespace,
+                ",".join(f"{key}={value}" for key, value in labels.items()),
+            )
+        return self.__pod_selectors[deployment_name]
+
+    def __get_target_pod(self, deployment_name):
+        target_pod = self.__target_pods.get(deployment_name)
+        if target_pod is None:
+            target_pod = self.__find_target_pod(deployment_name)
+            if target_pod is not None:
+                self.__target_pods[deployment_name] = target_pod
+        return target_pod
+
+    def __find_target_pod(self, deployment_name):
+        # Look the pods up through the deployment selector in its namespace. Names that are not a
+        # deployment (statefulsets, pod names) are matched by prefix with a paged scan over all pods.
+        selector = self.__get_pod_selector(deployment_name)
+        if selector is not None:
+            namespace, label_selector = selector
+            pods = self.api_instance.list_namespaced_pod(
+                namespace,
+                label_selector=label_selector,
+                field_selector="status.phase=Running",
+                limit=1,
+                _request_timeout=API_TIMEOUT,
+            )
+            return pods.items[0] if pods.items else None
+
+        return next(
+            (
+                pod
+                for pod in _paged_list(self.api_instance.list_pod_for_all_namespaces)
+                if pod.metadata.name.startswith(deployment_name)
+            ),
+            None,
+        )
+
+    def execute_command_on_pod(
+        self, deployment_name, command, persistent=False, namespace=None, label_selector=None
+    ):
+        # Callers that know where the pods live skip the deployment lookup
+        if namespace is not None and label_selector is not None:
+            self.__pod_selectors[deployment_name] = (namespace, label_selector)
+
+        if persistent:
+            shell = self.__get_persistent_shell(deployment_name)
+            if shell is not None:
+                try:
+                    return self.__execute_command_in_persistent_shell(
+                        deployment_name, shell, command
+                    )
+                except WebSocketException as e:
+                    # Raised while writing the command, it never reached the pod
+                    self.__log.error(
+                        f"[POD_MGR] Persistent shell for {deployment_name} failed: {str(e)}"
+                    )
+            self.__log.warning(
+                f"[POD_MGR] Persistent shell unavailable for {deployment_name}, using a one-shot exec."
+            )
+
+        # A cached target may have been replaced since it was looked up, in that case the exec is
+        # retried once on a freshly looked up pod
+        retry = deployment_name in self.__target_pods
+        while True:
+            target_pod = self.__get_target_pod(deployment_name)
+            if not target_pod:
+                self.__log.error(
+                    f"[POD_MGR] No running pods found for deployment {deployment_name}"
+                )
+                return None
 
-    def execute_command_on_pod(self, deployment_name, command):
-        pod_list = self.api_instance.list_pod_for_all_namespaces(watch=False)
-        target_pod = None
-        for pod in pod_list.items:
-            if pod.metadata.name.startswith(deployment_name):
-                target_pod = pod
-                break
+            pod_name = target_pod.metadata.name
+
+            try:
+                return self.__exec_on_pod(pod_name, target_pod.metadata.namespace, command)
+            except ApiException as e:
+                self.__log.error(f"[POD_MGR] Error executing command on pod {pod_name}: {str(e)}")
+                self.__target_pods.pop(deployment_name, None)
+                if not retry:
+                    return None
+                retry = False
+
+    def __exec_on_pod(self, pod_name, namespace, command):
+        # One-shot exec on a known pod, no lookup involved
+        exec_command = ["/bin/sh", "-c", command]
+        self.__log.info(f"[POD_MGR] Running command {exec_command} on pod {pod_name}")
+        return self.__stream_exec(
+            name=pod_name,
+            namespace=namespace,
+            command=exec_command,
+            stderr=True,
+            stdin=False,
+            stdout=True,
+            tty=False,
+        )
+
+    def __stream_exec(self, **kwargs):
+        # stream() swaps call_api on the ApiClient it is given until the exec returns, without any
+        # lock. On a shared client, concurrent REST calls and watches would go to the websocket and
+        # concurrent execs could leave it swapped, so every exec gets a client of its own.
+        with client.ApiClient(self.__exec_configuration) as exec_client:
+            return stream(client.CoreV1Api(exec_client).connect_get_namespaced_pod_exec, **kwargs)
+
+    def __exec_on_listed_pod(self, pod, command):
+        try:
+            return self.__exec_on_pod(pod.metadata.name, pod.metadata.namespace, command)
+        except ApiException as e:
+            self.__log.error(
+                f"[POD_MGR] Error executing command on pod {pod.metadata.name}: {str(e)}"
+            )
+            return None
 
+    # Open a long-lived shell on the first pod of a deployment, commands are then written to its stdin
+    def open_persistent_shell(self, deployment_name):
+        target_pod = self.__get_target_pod(deployment_name)
         if not target_pod:
             self.__log.error(f"[POD_MGR] No running pods found for deployment {deployment_name}")
             return None
 
-        pod_name = target_pod.metadata.name
-
         try:
-            exec_command = ["/bin/sh", "-c", command]
-            self.__log.info(f"[POD_MGR] Running command {exec_command} on pod {pod_name}")
-            resp = stream(
-                self.api_instance.connect_get_namespaced_pod_exec,
-                name=pod_name,
+            self.__log.info(f"[POD_MGR] Opening persistent shell on pod {target_pod.metadata.name}")
+            # The shell keeps its own websocket once open, no REST or watch caller shares its client
+            return self.__stream_exec(
+                name=target_pod.metadata.name,
                 namespace=target_pod.metadata.namespace,
-                command=exec_command,
+                command=["/bin/sh"],
                 stderr=True,
-                stdin=False,
+                stdin=True,
                 stdout=True,
                 tty=False,
+                _preload_content=False,
             )
-            return resp  # Return the captured output
         except ApiException as e:
-            self.__log.error(f"[POD_MGR] Error executing command on pod {pod_name}: {str(e)}")
+            self.__log.error(
+                f"[POD_MGR] Error opening shell on pod {target_pod.metadata.name}: {str(e)}"
+            )
+            self.__target_pods.pop(deployment_name, None)
+            return None
+
+    def execute_command_in_shell(self, shell, command, timeout=300):
+        # Commands are delimited by an end marker echoed once they return, stderr is merged so the
+        # output matches the one of a one-shot exec
+        # A failed write raises, the command was not sent. Once it is written, failures return None.
+        marker = f"__SCALEHUB_END_{uuid.uuid4().hex}__"
+        self.__log.info(f"[POD_MGR] Running command {command} in persistent shell")
+        shell.write_stdin(f"{{ {command}\n}} 2>&1; echo {marker}\n")
 
-    def execute_command_on_pods_by_label(self, label_selector, command, namespace="default"):
+        output = ""
+        deadline = monotonic() + timeout
         try:
-            pods = self.api_instance.list_namespaced_pod(
-                label_selector=label_selector, namespace=namespace
+            while shell.is_open() and monotonic() < deadline:
+                shell.update(timeout=1)
+                if shell.peek_stdout():
+                    output += shell.read_stdout()
+                    if marker in output:
+                        return output.split(marker, 1)[0]
+        except WebSocketException as e:
+            self.__log.error(f"[POD_MGR] Persistent shell failed while running {command}: {str(e)}")
+            return None
+        self.__log.error(f"[POD_MGR] No end marker received for command {command}")
+        return None
+
+    def __get_persistent_shell(self, deployment_name):
+        shell = self.__shells.get(deployment_name)
+        if shell is None or not shell.is_open():
+            shell = self.open_persistent_shell(deployment_name)
+            if shell is not None:
+                self.__shells[deployment_name] = shell
+        return shell
+
+    def __drop_persistent_shell(self, deployment_name, shell):
+        # Drop the shell and its pod, both will be looked up again on the next call
+        shell.close()
+        self.__shells.pop(deployment_name, None)
+        self.__target_pods.pop(deployment_name, None)
+
+    def __execute_command_in_persistent_shell(self, deployment_name, shell, command):
+        try:
+            resp = self.execute_command_in_shell(shell, command)
+        except WebSocketException:
+            self.__drop_persistent_shell(deployment_name, shell)
+            raise
+        if resp is None:
+            # The command was sent and may have run, it is reported but never run a second time
+            self.__log.error(
+                f"[POD_MGR] Command {command} sent to {deployment_name} did not complete."
+            )
+            self.__drop_persistent_shell(deployment_name, shell)
+        return resp
+
+    def close_persistent_shells(self):
+        # Shells are closed before their pods are deleted, the pods are looked up again afterwards
+        for shell in self.__shells.values():
+            shell.close()
+        self.__shells.clear()
+        self.__target_pods.clear()
+
+    # With persistent=True each pod keeps its exec websocket open, so repeated broadcasts to the same
+    # pods skip the connection setup
+    def execute_command_on_pods_by_label(
+        self, label_selector, command, namespace="default", persistent=False
+    ):
+        try:
+            pods = list(
+                _paged_list(
+                    self.api_instance.list_namespaced_pod, namespace, label_selector=label_selector
+                )
+            )
+            # Step 2: Execute command on the pods concurrently. The pods are already known, so
+            # one-shot execs go to them directly and persistent shells find them in the target cache.
+            if not persistent:
+                return _fan_out(lambda pod: self.__exec_on_listed_pod(pod, command), pods)
+            for pod in pods:
+                self.__target_pods.setdefault(pod.metadata.name, pod)
+            return _fan_out(
+                lambda pod: self.execute_command_on_pod(pod.metadata.name, command, persistent),
+                pods,
             )
-            for pod in pods.items:
-                self.__log.info(f"[POD_MGR] Running command {command} on pod {pod.metadata.name}")
-                # Step 2: Execute command on the pod
-                self.execute_command_on_pod(pod.metadata.name, command)
         except ApiException as e:
             self.__log.error(
                 f"[POD_MGR] Exception when calling CoreV1Api->list_namespaced_pod: {str(e)}"
@@ -131,12 +474,19 @@ class PodManager:
     # Delete pods by label
     def delete_pods_by_label(self, label_selector, namespace="default"):
         try:
-            pods = self.api_instance.list_namespaced_pod(
-                label_selector=label_selector, namespace=namespace
+            pods = list(
+                _paged_list(
+                    self.api_instance.list_namespaced_pod, namespace, label_selector=label_selector
+                )
+            )
+            # Step 2: Delete the pods concurrently
+            _fan_out(
+                lambda pod: self.api_instance.delete_namespaced_pod(
+                    pod.metadata.name, pod.metadata.namespace, _request_timeout=API_TIMEOUT
+                ),
+                pods,
             )
-            for pod in pods.items:
-                # Step 2: Delete the pod
-                self.api_instance.delete_namespaced_pod(pod.metadata.name, pod.metadata.namespace)
+            for pod in pods:
                 self.__log.info(f"[POD_MGR] Pod {pod.metadata.name} deleted")
         except ApiException as e:
             self.__log.error(
@@ -147,15 +497,23 @@ class PodManager:
     # Check if pod is running and ready
     def is_pod_ready(self, pod_name, namespace="default"):
         try:
-            pod = self.api_instance.read_namespaced_pod_status(pod_name, namespace)
-            if pod.status.phase == "Running":
-                for condition in pod.status.conditions:
-                    if condition.type == "Ready" and condition.status == "True":
-                        return True
+            # Let the API server drop pods that are not running, only the Ready condition of a
+            # running pod is checked here
+            pods = self.api_instance.list_namespaced_pod(
+                namespace,
+                field_selector=f"metadata.name={pod_name},status.phase=Running",
+                resource_version="0",
+                _request_timeout=API_TIMEOUT,
+            )
+            if not pods.items:
+                return False
+            for condition in pods.items[0].status.conditions or []:
+                if condition.type == "Ready" and condition.status == "True":
+                    return True
             return False
         except ApiException as e:
             self.__log.error(
-                f"[POD_MGR] Exception when calling CoreV1Api->read_namespaced_pod_status: {str(e)}"
+                f"[POD_MGR] Exception when calling CoreV1Api->list_namespaced_pod: {str(e)}"
             )
             return False
 
@@ -166,19 +524,14 @@ class PodManager:
             return ""
         else:
             try:
-                pods = self.api_instance.list_namespaced_pod(
-                    label_selector=label_selector, namespace=namespace
-                )
-                logs = []
-                for pod in pods.items:
-                    logs.append(
-                        self.api_instance.read_namespaced_pod_log(
-                            pod.metadata.name,
-                            namespace,
-                            since_seconds=time,
-                            pretty=True,
-                        )
+                pods = list(
+                    _paged_list(
+                        self.api_instance.list_namespaced_pod,
+                        namespace,
+                        label_selector=label_selector,
                     )
+                )
+                logs = _read_pod_logs(self.api_instance, pods, namespace, since_seconds=time)
                 return "\n".join(logs)
             except ApiException as e:
                 self.__log.error(f"[POD_MGR] Exception when getting logs: {str(e)}")
@@ -186,10 +539,10 @@ class PodManager:
 
 
 class DeploymentManager:
-    def __init__(self, log: Logger):
+    def __init__(self, log: Logger, api_client: client.ApiClient = None):
         self.__log = log
         self.t: Tools = Tools(self.__log)
-        self.api_instance = client.AppsV1Api()
+        self.api_instance = client.AppsV1Api(api_client)
 
     def create_deployment_from_template(self, template_filename, params):
         # Load resource definition from file
@@ -200,6 +553,7 @@ class DeploymentManager:
                 name=resource_object["metadata"]["name"],
                 namespace=resource_object["metadata"]["namespace"],
                 body=resource_object,
+                _request_timeout=API_TIMEOUT,
             )
 
         except ApiException as e:
@@ -209,6 +563,7 @@ class DeploymentManager:
                     namespace=resource_object["metadata"]["namespace"],
                     body=resource_object,
                     async_req=False,
+                    _request_timeout=API_TIMEOUT,
                 )
                 self.__log.info(
                     f"[DEP_MGR] Deployment {resource_object['metadata']['name']} created."
@@ -219,26 +574,20 @@ class DeploymentManager:
         # Load resource definition from file
         resource_object = self.t.load_resource_definition(template_filename, params)
         try:
-            # Check if the deployment already exists
-            check_deployment = self.api_instance.read_namespaced_deployment(
+            # Delete directly, a missing deployment is reported by a 404
+            self.api_instance.delete_namespaced_deployment(
                 name=resource_object["metadata"]["name"],
                 namespace=resource_object["metadata"]["namespace"],
+                async_req=False,
+                _request_timeout=API_TIMEOUT,
             )
-
-            if check_deployment:
-                self.api_instance.delete_namespaced_deployment(
-                    name=resource_object["metadata"]["name"],
-                    namespace=resource_object["metadata"]["namespace"],
-                    async_req=False,
-                )
-                self.__log.info(
-                    f"[DEP_MGR] Deployment {resource_object['metadata']['name']} deleted."
-                )
-            else:
+            self.__log.info(f"[DEP_MGR] Deployment {resource_object['metadata']['name']} deleted.")
+        except ApiException as e:
+            if e.status == 404:
                 self.__log.info(
                     f"[DEP_MGR] Deployment {resource_object['metadata']['name']} does not exist."
                 )
-        except ApiException as e:
+                return None
             self.__log.error(
                 f"[DEP_MGR] Exception when calling AppsV1Api->delete_namespaced_deployment: {str(e)}\n"
             )
@@ -246,26 +595,14 @@ class DeploymentManager:
 
     # Scale a deployment to a specified number of replicas
     def scale_deployment(self, deployment_name, replicas=1, namespace="default"):
-        # Fetch the deployment
-        try:
-            deployment_name = self.api_instance.read_namespaced_deployment(
-                name=deployment_name, namespace=namespace, async_req=False
-            )
-        except ApiException as e:
-            self.__log.error(
-                f"[DEP_MGR] Exception when calling AppsV1Api->read_namespaced_deployment: {str(e)}\n"
-            )
-            return None
-
-        # Scale the deployment
-        # deployment.spec.replicas = replicas
-
+        # Scale the deployment, a missing deployment is reported by the patch itself
         patch = {"spec": {"replicas": int(replicas)}}
         try:
             self.api_instance.patch_namespaced_deployment(
                 name=deployment_name,
                 namespace=namespace,
                 body=patch,
+                _request_timeout=API_TIMEOUT,
             )
             self.__log.info(f"[DEP_MGR] Deployment {deployment_name} scaled to {replicas} replica.")
         except ApiException as e:
@@ -273,24 +610,47 @@ class DeploymentManager:
                 f"[DEP_MGR] Exception when calling AppsV1Api->patch_namespaced_deployment: {str(e)}\n"
             )
 
+    def wait_for_replicas(self, deployment_name, replicas, namespace="default", timeout_seconds=20):
+        # Watch the deployment until it runs exactly the requested number of ready pods
+        w = watch.Watch()
+        try:
+            for event in w.stream(
+                self.api_instance.list_namespaced_deployment,
+                namespace,
+                field_selector=f"metadata.name={deployment_name}",
+                timeout_seconds=timeout_seconds,
+            ):
+                status = event["object"].status
+                if (status.replicas or 0) == replicas and (status.ready_replicas or 0) == replicas:
+                    return True
+        except ApiException as e:
+            self.__log.error(f"[DEP_MGR] Exception when watching deployment: {str(e)}")
+            return False
+        finally:
+            w.stop()
+        self.__log.warning(
+            f"[DEP_MGR] Deployment {deployment_name} did not reach {replicas} replicas in time."
+        )
+        return False
+
     def get_deployment_replicas(self, deployment_name, namespace):
         try:
-            deployment = self.api_instance.read_namespaced_deployment(
-                name=deployment_name, namespace=namespace, async_req=False
+            deployment = _cached_get(
+                self.api_instance.list_namespaced_deployment, deployment_name, namespace
             )
             return int(deployment.spec.replicas)
         except ApiException as e:
             self.__log.error(
-                f"[DEP_MGR] Exception when calling AppsV1Api->read_namespaced_deployment: {str(e)}\n"
+                f"[DEP_MGR] Exception when calling AppsV1Api->list_namespaced_deployment: {str(e)}\n"
             )
             return None
 
 
 class ServiceManager:
-    def __init__(self, log: Logger):
+    def __init__(self, log: Logger, api_client: client.ApiClient = None):
         self.__log = log
         self.t: Tools = Tools(self.__log)
-        self.api_instance = client.CoreV1Api()
+        self.api_instance = client.CoreV1Api(api_client)
 
     def create_service_from_template(self, template_filename, params, namespace="default"):
         # Load resource definition from file
@@ -298,49 +658,41 @@ class ServiceManager:
         service_name = resource_object["metadata"]["name"]
 
         try:
-            # Patch the existing service
+            # Server-side apply creates the service or updates it in a single request
             self.api_instance.patch_namespaced_service(
                 name=service_name,
                 namespace=namespace,
                 body=resource_object,
+                field_manager=FIELD_MANAGER,
+                force=True,
+                _content_type="application/apply-patch+yaml",
+                _request_timeout=API_TIMEOUT,
             )
-            self.__log.info(f"[SVC_MGR] Service {service_name} patched.")
+            self.__log.info(f"[SVC_MGR] Service {service_name} applied.")
         except ApiException as e:
-            if e.status == 404:
-                # Service does not exist, create it
-                self.api_instance.create_namespaced_service(
-                    namespace=namespace, body=resource_object, async_req=False
-                )
-                self.__log.info(f"[SVC_MGR] Service {service_name} created.")
-            else:
-                self.__log.error(
-                    f"[SVC_MGR] Exception when calling CoreV1Api->create_namespaced_service: {str(e)}\n"
-                )
-                return None
+            self.__log.error(
+                f"[SVC_MGR] Exception when calling CoreV1Api->patch_namespaced_service: {str(e)}\n"
+            )
+            return None
 
     def delete_service_from_template(self, template_filename, params):
         # Load resource definition from file
         resource_object = self.t.load_resource_definition(template_filename, params)
         try:
-            # Check if the service already exists
-            check_service = self.api_instance.read_namespaced_service(
+            # Delete directly, a missing service is reported by a 404
+            self.api_instance.delete_namespaced_service(
                 name=resource_object["metadata"]["name"],
                 namespace=resource_object["metadata"]["namespace"],
+                async_req=False,
+                _request_timeout=API_TIMEOUT,
             )
-
-            if check_service:
-                self.api_instance.delete_namespaced_service(
-                    name=resource_object["metadata"]["name"],
-                    namespace=resource_object["metadata"]["namespace"],
-                    async_req=False,
-                )
-                self.__log.info(f"[SVC_MGR] Service {resource_object['metadata']['name']} deleted.")
-            else:
+            self.__log.info(f"[SVC_MGR] Service {resource_object['metadata']['name']} deleted.")
+        except ApiException as e:
+            if e.status == 404:
                 self.__log.info(
                     f"[SVC_MGR] Service {resource_object['metadata']['name']} does not exist."
                 )
-
-        except ApiException as e:
+                return None
             self.__log.error(
                 f"[SVC_MGR] Exception when calling CoreV1Api->delete_namespaced_service: {str(e)}\n"
             )
@@ -348,16 +700,19 @@ class ServiceManager:
 
 
 class JobManager:
-    def __init__(self, log: Logger):
+    def __init__(self, log: Logger, api_client: client.ApiClient = None):
         self.__log = log
-        self.api_instance = client.BatchV1Api()
+        self.api_instance = client.BatchV1Api(api_client)
+        self.core_api = client.CoreV1Api(api_client)
 
     def delete_job(self, job_name, namespace="default"):
         # Create a Kubernetes API client
 
         # Delete the job
         try:
-            self.api_instance.delete_namespaced_job(name=job_name, namespace=namespace)
+            self.api_instance.delete_namespaced_job(
+                name=job_name, namespace=namespace, _request_timeout=API_TIMEOUT
+            )
             self.__log.info(f"Job {job_name} deleted.")
         except client.ApiException as e:
             self.__log.error(f"Exception when calling BatchV1Api->delete_namespaced_job: {str(e)}")
@@ -367,7 +722,9 @@ class JobManager:
 
         # Get the job
         try:
-            state = self.api_instance.read_namespaced_job_status(name=job_name, namespace=namespace)
+            state = self.api_instance.read_namespaced_job_status(
+                name=job_name, namespace=namespace, _request_timeout=API_TIMEOUT
+            )
             return state.status.conditions
         except client.ApiException as e:
             return e
@@ -375,25 +732,29 @@ class JobManager:
     # Deploy a job from a yaml resource definition
     def create_job(self, resource_definition):
         try:
-            resource_obj = yaml.safe_load(resource_definition)
+            resource_obj = yaml.load(resource_definition, Loader=YAML_LOADER)
             resource_type = resource_obj["kind"]
             resource_name = resource_obj["metadata"]["name"]
             namespace = resource_obj["metadata"]["namespace"]
 
-            self.api_instance.create_namespaced_job(namespace, resource_obj)
+            self.api_instance.create_namespaced_job(
+                namespace, resource_obj, _request_timeout=API_TIMEOUT
+            )
             self.__log.info(f"{resource_type} {resource_name} created in namespace {namespace}.")
         except ApiException as e:
             self.__log.error(f"Exception when operating on resource: {str(e)}")
 
     def get_job_logs(self, job_name, namespace):
         try:
-            core_v1 = core_v1_api.CoreV1Api()
-            pod_list = core_v1.list_namespaced_pod(namespace, label_selector=f"job-name={job_name}")
-            logs = []
-            if pod_list.items:
-                for pod in pod_list.items:
-                    logs.append(core_v1.read_namespaced_pod_log(pod.metadata.name, namespace))
-                return "\n".join(logs)
+            pods = list(
+                _paged_list(
+                    self.core_api.list_namespaced_pod,
+                    namespace,
+                    label_selector=f"job-name={job_name}",
+                )
+            )
+            if pods:
+                return "\n".join(_read_pod_logs(self.core_api, pods, namespace))
             else:
                 self.__log.error(f"No pods found for Job {job_name}.")
                 return ""
@@ -402,72 +763,196 @@ class JobManager:
             return ""
 
 
+@lru_cache(maxsize=64)
+def _parse_label_selector(label_selector):
+    # Split a selector "k1=v1,k2!=v2" into ((k1, v1, True), (k2, v2, False)), the last field
+    # tells whether the label must equal the value. Returns None for set-based expressions,
+    # which are left to the API server.
+    requirements = []
+    for expression in label_selector.split(","):
+        key, sep, value = expression.strip().partition("=")
+        if not sep or "(" in key or " " in key:
+            return None
+        if key.endswith("!"):
+            requirements.append((key[:-1], value, False))
+        else:
+            requirements.append((key, value.lstrip("="), True))
+    return tuple(requirements)
+
+
+def _is_stale(cached, obj):
+    # resourceVersion is opaque in the API contract, but the API server hands out etcd revisions
+    # which compare as integers. Anything else is never considered stale.
+    if cached is None:
+        return False
+    try:
+        return int(obj.metadata.resource_version) < int(cached.metadata.resource_version)
+    except (TypeError, ValueError):
+        return False
+
+
 class NodeManager:
     node_types = ["grid5000", "vm_grid5000", "pico"]
     vm_types = ["small", "medium"]
-
-    def __init__(self, log: Logger):
+    WORKER_LABEL = "node-role.kubernetes.io/worker=consumer"
+    WORKER_LABEL_KEYS = (
+        (WORKER_LABEL,)
+        + tuple(f"node-role.kubernetes.io/tnode={node_type}" for node_type in node_types)
+        + tuple(f"node-role.kubernetes.io/vm_grid5000={vm_type}" for vm_type in vm_types)
+    )
+    WORKER_LABEL_KEY_SET = frozenset(WORKER_LABEL_KEYS)
+    # Nodes that are not yet used and not full
+    FREE_NODE_SELECTOR = (
+        "node-role.kubernetes.io/scaling!=SCHEDULABLE,node-role.kubernetes.io/state!=FULL"
+    )
+    # Seconds to wait for the node informer to complete its initial list
+    INFORMER_SYNC_TIMEOUT_S = 30
+
+    def __init__(self, log: Logger, api_client: client.ApiClient = None):
         self.__log = log
-        self.api_instance = client.CoreV1Api()
+        self.api_instance = client.CoreV1Api(api_client)
+        # Node name -> V1Node, kept up to date by a watch running on a daemon thread. The watch is
+        # only started on the first node_list call.
+        self.__node_cache = {}
+        self.__node_cache_lock = threading.Lock()
+        self.__node_cache_synced = threading.Event()
+        self.__informer = None
+
+    def __run_informer(self):
+        resource_version = None
+        while True:
+            try:
+                if resource_version is None:
+                    nodes = self.__list_node_cached()
+                    with self.__node_cache_lock:
+                        self.__node_cache = {node.metadata.name: node for node in nodes.items}
+                    resource_version = nodes.metadata.resource_version
+                    self.__node_cache_synced.set()
+
+                w = watch.Watch()
+                for event in w.stream(
+                    self.api_instance.list_node,
+                    resource_version=resource_version,
+                    allow_watch_bookmarks=True,
+                    timeout_seconds=300,
+                ):
+                    self.__apply_node_event(event)
+                # The watch timed out, resume from the last resource version seen
+                resource_version = w.resource_version
+            except ApiException as e:
+                # 410 Gone means our resource version expired, the nodes are listed again
+                if e.status != 410:
+                    self.__watch_failed(e)
+                resource_version = None
+            except Exception as e:
+                # Dropped connections and read timeouts surface as urllib3 errors
+                self.__watch_failed(e)
+                resource_version = None
+
+    def __watch_failed(self, error):
+        # Until the next list succeeds the cache may miss changes, lookups go to the API server
+        self.__node_cache_synced.clear()
+        self.__log.error(f"[NODE_MGR] Node watch failed: {str(error)}")
+        sleep(5)
+
+    def __apply_node_event(self, event):
+        if event["type"] not in ("ADDED", "MODIFIED", "DELETED"):
+            return
+        node = event["object"]
+        with self.__node_cache_lock:
+            if event["type"] == "DELETED":
+                self.__node_cache.pop(node.metadata.name, None)
+            elif not _is_stale(self.__node_cache.get(node.metadata.name), node):
+                # A late event must not undo a label written through by mark_node
+                self.__node_cache[node.metadata.name] = node
+
+    def __cache_synced(self):
+        if self.__informer is None or not self.__informer.is_alive():
+            self.__informer = threading.Thread(
+                target=self.__run_informer, name="node-informer", daemon=True
+            )
+            self.__informer.start()
+            return self.__node_cache_synced.wait(timeout=self.INFORMER_SYNC_TIMEOUT_S)
+        # The informer is re-listing after a failure, do not block lookups on it
+        return self.__node_cache_synced.is_set()
+
+    def __list_node_cached(self):
+        # Served from the API server watch cache instead of a quorum read from etcd. The result may
+        # lag behind by a few hundred milliseconds, which the watch started from it catches up on.
+        return self.api_instance.list_node(resource_version="0", _request_timeout=API_TIMEOUT)
 
     def node_list(self, label_selector):
+        requirements = _parse_label_selector(label_selector)
+        if requirements is not None and self.__cache_synced():
+            with self.__node_cache_lock:
+                nodes = list(self.__node_cache.values())
+            return [
+                node
+                for node in nodes
+                if all(
+                    ((node.metadata.labels or {}).get(key) == value) == equal
+                    for key, value, equal in requirements
+                )
+            ]
         try:
-            nodes = self.api_instance.list_node(label_selector=label_selector)
+            # Quorum read, a stale list could miss a label just written by mark_node and hand out
+            # the same node twice
+            nodes = self.api_instance.list_node(
+                label_selector=label_selector, _request_timeout=API_TIMEOUT
+            )
             return nodes.items
         except ApiException as e:
             self.__log.error(f"[NODE_MGR] Exception when calling CoreV1Api->list_node: {str(e)}\n")
             return None
 
     def get_available_worker_nodes(self):
-        label_keys = ["node-role.kubernetes.io/worker=consumer"]
-        for node_type in self.node_types:
-            label_keys.append(f"node-role.kubernetes.io/tnode={node_type}")
-
-        for vm_type in self.vm_types:
-            label_keys.append(f"node-role.kubernetes.io/vm_grid5000={vm_type}")
-
-        nodes = self.node_list(",".join(label_keys))
-        nodes_count = {}
-        for node in nodes:
-            for label in node.metadata.labels:
-                if label in label_keys:
-                    if label in nodes_count:
-                        nodes_count[label] += 1
-                    else:
-                        nodes_count[label] = 1
-        return nodes_count
+        # Select the workers only, each type label is then counted on its own. Requiring every
+        # key in a single selector would match no node at all.
+        nodes = self.node_list(self.WORKER_LABEL)
+        nodes_count = Counter()
+        for node in nodes or []:
+            # Labels are compared in their key=value form, as they appear in WORKER_LABEL_KEYS
+            node_labels = {f"{key}={value}" for key, value in node.metadata.labels.items()}
+            nodes_count.update(self.WORKER_LABEL_KEY_SET.intersection(node_labels))
+        return dict(nodes_count)
 
     def get_next_node(self, node_type, vm_type=None):
-        label_keys = [
-            "node-role.kubernetes.io/worker=consumer",
-            f"node-role.kubernetes.io/tnode={node_type}",
-        ]
+        label_keys = [self.WORKER_LABEL, f"node-role.kubernetes.io/tnode={node_type}"]
 
         if vm_type:
             label_keys.append(f"node-role.kubernetes.io/vm_grid5000={vm_type}")
 
+        # Return a node that is not yet used => it doesn't the node-role.kubernetes.io/scaling label with value SCHEDULABLE
+        # And that is not full => it doesn't have the node-role.kubernetes.io/state label with value FULL
+        label_keys.append(self.FREE_NODE_SELECTOR)
+
         nodes = self.node_list(",".join(label_keys))
         if nodes:
-
-            # Return a node that is not yet used => it doesn't the node-role.kubernetes.io/scaling label with value SCHEDULABLE
-            # And that is not full => it doesn't have the node-role.kubernetes.io/state label with value FULL
-            for node in nodes:
-                if (
-                    node.metadata.labels.get("node-role.kubernetes.io/scaling") != "SCHEDULABLE"
-                    and node.metadata.labels.get("node-role.kubernetes.io/state") != "FULL"
-                ):
-                    return node.metadata.name
-        else:
-            return None
+            return nodes[0].metadata.name
+        return None
 
     def mark_node(self, node_name, label, value):
         try:
-            node = self.api_instance.read_node(node_name)
-            node.metadata.labels[label] = value
-            body = {"metadata": {"labels": node.metadata.labels}}
-            self.api_instance.patch_node(node_name, body=body)
+            # JSON patch touching only the changed label, "add" also replaces an existing value.
+            # "/" in the label key is escaped as "~1" in the JSON pointer.
+            body = [
+                {
+                    "op": "add",
+                    "path": f"/metadata/labels/{label.replace('~', '~0').replace('/', '~1')}",
+                    "value": value,
+                }
+            ]
+            node = self.api_instance.patch_node(
+                node_name,
+                body=body,
+                _content_type="application/json-patch+json",
+                _request_timeout=API_TIMEOUT,
+            )
+            # Write the patched node through to the cache so that lookups issued right after do
+            # not wait for the watch event
+            self.__apply_node_event({"type": "MODIFIED", "object": node})
         except ApiException as e:
-            self.__log.error(f"[NODE_MGR] Exception when calling CoreV1Api->list_node: {str(e)}\n")
+            self.__log.error(f"[NODE_MGR] Exception when calling CoreV1Api->patch_node: {str(e)}\n")
             raise e
 
     def mark_node_as_schedulable(self, node_name):
@@ -498,92 +983,170 @@ class NodeManager:
         self.__log.info("[NODE_MGR] Resetting state labels.")
         # Get all nodes and mark them as empty
         nodes = self.node_list("node-role.kubernetes.io/state=FULL")
-        for node in nodes:
-            self.mark_node_as_empty(node.metadata.name)
+        _fan_out(lambda node: self.mark_node_as_empty(node.metadata.name), nodes)
 
     def reset_scaling_labels(self):
         self.__log.info("[NODE_MGR] Resetting scaling labels to unschedulable.")
         # Get all nodes and mark them as schedulable
         nodes = self.get_schedulable_nodes()
-        for node in nodes:
-            self.mark_node_as_unschedulable(node.metadata.name)
+        _fan_out(lambda node: self.mark_node_as_unschedulable(node.metadata.name), nodes)
 
 
-class StatefulSetManager:
-    def __init__(self, log: Logger):
-        self.__log = log
-        self.t: Tools = Tools(self.__log)
-        self.api_instance = client.AppsV1Api()
+class StatefulSetReadiness:
+    """Ready replica counts of statefulsets, pushed to waiting callers by one watch per namespace.
 
-    def __get_statefulset_ready_replicas(self, statefulset_name, namespace):
+    Concurrent scale operations in a namespace share a single list_namespaced_stateful_set watch
+    instead of each polling or watching on its own.
+    """
 
+    def __init__(self, log: Logger, api_instance: client.AppsV1Api):
+        self.__log = log
+        self.api_instance = api_instance
+        self.__lock = threading.Lock()
+        # (namespace, name) -> ready replicas last reported by the watch
+        self.__ready = {}
+        # (namespace, name) -> list of (target ready replicas, event set once it is reached)
+        self.__waiters = {}
+        self.__watches = {}
+
+    def __run_watch(self, namespace):
         try:
-            statefulset = self.api_instance.read_namespaced_stateful_set(
-                name=statefulset_name, namespace=namespace, async_req=False
-            )
-            num_ready_replicas = int(statefulset.status.ready_replicas or 0)
-            return num_ready_replicas
-        except ApiException as e:
-            self.__log.error(
-                f"[STS_MGR] Exception when calling AppsV1Api->read_namespaced_stateful_set: {str(e)}\n"
-            )
-            return None
+            while True:
+                try:
+                    # Each watch starts with ADDED events for every statefulset, the ready counts
+                    # are refreshed after a failure
+                    w = watch.Watch()
+                    for event in w.stream(
+                        self.api_instance.list_namespaced_stateful_set,
+                        namespace=namespace,
+                        timeout_seconds=300,
+                    ):
+                        self.apply_event(event)
+                except Exception as e:
+                    # API errors as well as dropped connections and read timeouts from urllib3
+                    self.__log.error(f"[STS_MGR] StatefulSet watch on {namespace} failed: {str(e)}")
+                    sleep(5)
+        finally:
+            # Let the next wait() start a new watch if this thread ever exits
+            with self.__lock:
+                self.__watches.pop(namespace, None)
+
+    def __ensure_watch(self, namespace):
+        with self.__lock:
+            if namespace not in self.__watches:
+                thread = threading.Thread(
+                    target=self.__run_watch,
+                    args=(namespace,),
+                    name=f"statefulset-readiness-{namespace}",
+                    daemon=True,
+                )
+                self.__watches[namespace] = thread
+                thread.start()
 
-    # Scale a statefulset to a specified number of replicas
-    def scale_statefulset(self, statefulset_name, replicas=1, namespace="default"):
-        # Fetch the statefulset
+    def apply_event(self, event):
+        if event["type"] not in ("ADDED", "MODIFIED"):
+            return
+        statefulset = event["object"]
+        key = (statefulset.metadata.namespace, statefulset.metadata.name)
+        ready = int(statefulset.status.ready_replicas or 0)
+        with self.__lock:
+            self.__ready[key] = ready
+            for target, reached in self.__waiters.get(key, []):
+                if target == ready:
+                    reached.set()
+
+    def wait(self, namespace, replicas, timeout=75):
+        """Block until each statefulset in replicas (name -> target ready replicas) reports its
+        target. Returns False if the timeout expires first."""
+        self.__ensure_watch(namespace)
+        waiters = {}
+        with self.__lock:
+            for name, target in replicas.items():
+                key = (namespace, name)
+                reached = threading.Event()
+                if self.__ready.get(key) == target:
+                    reached.set()
+                waiters[key] = (target, reached)
+                self.__waiters.setdefault(key, []).append(waiters[key])
+
+        deadline = monotonic() + timeout
         try:
-            statefulset = self.api_instance.read_namespaced_stateful_set(
-                name=statefulset_name, namespace=namespace, async_req=False
-            )
-        except ApiException as e:
-            self.__log.error(
-                f"[STS_MGR] Exception when calling AppsV1Api->read_namespaced_stateful_set: {str(e)}\n"
+            pending = [
+                key
+                for key, (_, reached) in waiters.items()
+                if not reached.wait(max(0.0, deadline - monotonic()))
+            ]
+        finally:
+            with self.__lock:
+                for key, waiter in waiters.items():
+                    self.__waiters[key].remove(waiter)
+                    if not self.__waiters[key]:
+                        del self.__waiters[key]
+
+        if pending:
+            self.__log.warning(
+                f"[STS_MGR] StatefulSets not ready in time: {[name for _, name in pending]}"
             )
-            raise e
+            return False
+        return True
+
+
+class StatefulSetManager:
+    def __init__(self, log: Logger, api_client: client.ApiClient = None):
+        self.__log = log
+        self.t: Tools = Tools(self.__log)
+        self.api_instance = client.AppsV1Api(api_client)
+        self.readiness = StatefulSetReadiness(log, self.api_instance)
 
-        # Scale the statefulset
+    def __patch_replicas(self, statefulset_name, replicas, namespace):
         patch = {"spec": {"replicas": int(replicas)}}
         try:
             self.api_instance.patch_namespaced_stateful_set(
                 name=statefulset_name,
                 namespace=namespace,
                 body=patch,
+                _request_timeout=API_TIMEOUT,
             )
             self.__log.info(
                 f"[STS_MGR] StatefulSet {statefulset_name} scaled to {str(replicas)} replica."
             )
-
-            retry = 15
-            # Wait until the statefulset is ready
-            while retry > 0:
-                if self.__get_statefulset_ready_replicas(statefulset_name, namespace) == replicas:
-                    return True
-                retry -= 1
-                sleep(5)
-
         except ApiException as e:
             self.__log.error(
                 f"[STS_MGR] Exception when calling AppsV1Api->patch_namespaced_stateful_set: {str(e)}\n"
             )
             raise e
 
+    # Scale a statefulset to a specified number of replicas
+    def scale_statefulset(self, statefulset_name, replicas=1, namespace="default"):
+        # Check the statefulset exists
+        try:
+            _cached_get(self.api_instance.list_namespaced_stateful_set, statefulset_name, namespace)
+        except ApiException as e:
+            self.__log.error(
+                f"[STS_MGR] Exception when calling AppsV1Api->list_namespaced_stateful_set: {str(e)}\n"
+            )
+            raise e
+
+        # Scale the statefulset and wait until it is ready
+        self.__patch_replicas(statefulset_name, replicas, namespace)
+        return self.readiness.wait(namespace, {statefulset_name: int(replicas)})
+
     def get_statefulset_replicas(self, statefulset_name, namespace):
         try:
-            statefulset = self.api_instance.read_namespaced_stateful_set(
-                name=statefulset_name, namespace=namespace, async_req=False
+            statefulset = _cached_get(
+                self.api_instance.list_namespaced_stateful_set, statefulset_name, namespace
             )
             return int(statefulset.spec.replicas)
         except ApiException as e:
             self.__log.error(
-                f"[STS_MGR] Exception when calling AppsV1Api->read_namespaced_stateful_set: {str(e)}\n"
+                f"[STS_MGR] Exception when calling AppsV1Api->list_namespaced_stateful_set: {str(e)}\n"
             )
             return
 
     def get_statefulset_by_label(self, label_selector=None, namespace="default"):
         try:
             statefulsets_res = self.api_instance.list_namespaced_stateful_set(
-                namespace=namespace, label_selector=label_selector
+                namespace=namespace, label_selector=label_selector, _request_timeout=API_TIMEOUT
             )
             return statefulsets_res
         except ApiException as e:
@@ -593,29 +1156,46 @@ class StatefulSetManager:
             return None
 
     def get_count_of_taskmanagers(self) -> dict[Any, Any] | None:
-        replicas = {}
         tm_labels = "app=flink,component=taskmanager"
 
+        # Only names and replica counts are needed, read them from the raw JSON instead of
+        # deserializing full V1StatefulSet models
         try:
-            statefulsets = self.get_statefulset_by_label(tm_labels, "flink")
-
-            for statefulset in statefulsets.items:
-                replicas[statefulset.metadata.name] = statefulset.spec.replicas
-            return replicas
+            resp = self.api_instance.list_namespaced_stateful_set(
+                namespace="flink",
+                label_selector=tm_labels,
+                _preload_content=False,
+                _request_timeout=API_TIMEOUT,
+            )
+            statefulsets = json.loads(resp.data)
         except ApiException as e:
             self.__log.error(
                 f"[STS_MGR] Exception when calling AppsV1Api->list_namespaced_stateful_set: {str(e)}\n"
             )
             return None
 
+        return {
+            statefulset["metadata"]["name"]: statefulset["spec"]["replicas"]
+            for statefulset in statefulsets["items"]
+        }
+
     def reset_taskmanagers(self):
         self.__log.info("[STS_MGR] Resetting taskmanagers.")
 
         tm_labels = "app=flink,component=taskmanager"
         statefulsets = self.get_statefulset_by_label(tm_labels, "flink")
+        if statefulsets is None:
+            self.__log.error("[STS_MGR] Could not list taskmanagers to reset.")
+            return False
 
-        for statefulset in statefulsets.items:
-            self.scale_statefulset(statefulset.metadata.name, 0, "flink")
+        # Scale every taskmanager down first, then wait for all of them on the shared watch
+        _fan_out(
+            lambda statefulset: self.__patch_replicas(statefulset.metadata.name, 0, "flink"),
+            statefulsets.items,
+        )
+        return self.readiness.wait(
+            "flink", {statefulset.metadata.name: 0 for statefulset in statefulsets.items}
+        )
 
 
 # class ChaosManager:
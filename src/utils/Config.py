@@ -14,15 +14,55 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import configparser as cp
+import copy
 import json
 import os.path
 from dataclasses import dataclass
-from inspect import getmembers, isclass
+from functools import lru_cache
+from inspect import isclass
 
 import yaml
 
 from src.utils.Defaults import DefaultKeys as Key, ConfigKey
 from src.utils.Logger import Logger
+from src.utils.Tools import YAML_LOADER
+
+# Defaults file path -> (mtime, flattened "section.key" values, parsed load generators). The
+# defaults file is read once per process and shared by every Config loaded from an ini file, it is
+# read again only when its modification time changes.
+_DEFAULTS_CACHE = {}
+
+
+@lru_cache(maxsize=None)
+def _subclasses_of(key_class):
+    # Key classes are static, reflect on each of them once. vars() only holds the classes defined
+    # in the class body, in definition order.
+    return tuple(
+        (name, member)
+        for name, member in vars(key_class).items()
+        if isclass(member) and member.__module__ == key_class.__module__
+    )
+
+
+@lru_cache(maxsize=None)
+def _mandatory_attrs(key_class):
+    return tuple(
+        (pkey, pval)
+        for pkey, pval in vars(key_class).items()
+        if isinstance(pval, ConfigKey) and not pval.is_optional
+    )
+
+
+class ConfigValidationError(ValueError):
+    """Raised when a configuration misses a mandatory section or parameter.
+
+    missing holds the (section, parameter) pairs that were not found, parameter is None when the
+    whole section is missing.
+    """
+
+    def __init__(self, message, missing=()):
+        super().__init__(message)
+        self.missing = list(missing)
 
 
 @dataclass
@@ -97,32 +137,39 @@ class Config:
                 self.__validate_and_read_sections(parser, "platforms", Key.Platforms)
 
     def __init_defaults(self):
-        parser = cp.ConfigParser()
-        parser.read(self.DEFAULTS_PATH)
-        for section in parser.sections():
-            for key in parser[section]:
-                dict_key = f"{section}.{key}"
-                self.__config[dict_key] = parser[section][key]
-        self.__config[Key.Experiment.Generators.generators.key] = self.__parse_load_generators(
-            parser
-        )
+        try:
+            mtime = os.stat(self.DEFAULTS_PATH).st_mtime_ns
+        except OSError:
+            # ConfigParser.read skips missing files as well
+            mtime = None
+        defaults = _DEFAULTS_CACHE.get(self.DEFAULTS_PATH)
+        if defaults is None or defaults[0] != mtime:
+            parser = cp.ConfigParser()
+            parser.read(self.DEFAULTS_PATH)
+            values = {
+                f"{section}.{key}": parser[section][key]
+                for section in parser.sections()
+                for key in parser[section]
+            }
+            defaults = (mtime, values, self.__parse_load_generators(parser))
+            _DEFAULTS_CACHE[self.DEFAULTS_PATH] = defaults
+        _, values, generators = defaults
+        self.__config.update(values)
+        # Generators are dicts that callers may modify, each Config gets its own copy
+        self.__config[Key.Experiment.Generators.generators.key] = copy.deepcopy(generators)
 
     def __validate_and_read_sections(self, parser, section_base, key_class, *args):
         ignored_keys = args[0] if args else []
 
         # Get class representations of the keys
-        subclasses = [
-            member
-            for member in getmembers(key_class, isclass)
-            if member[1].__module__ == key_class.__module__
-        ]
+        subclasses = _subclasses_of(key_class)
 
         # Special handling for platforms section
         if section_base == "platforms":
             # Load keys from base section
+            prefix = f"{section_base}."
             for key, value in parser.items(section_base):
-                dict_key = f"{section_base}.{key}"
-                self.__config[dict_key] = value
+                self.__config[prefix + key] = value
 
             # Load platform names
             platform_names = parser[section_base].get("platforms").split()
@@ -133,30 +180,33 @@ class Config:
                 section_name = f"{section_base}.{platform_name}"
                 platform_dict = {"name": platform_name}
                 if parser.has_section(section_name):
-                    self.__config[f"{section_name}.name"] = platform_name
+                    section_prefix = f"{section_name}."
+                    self.__config[section_prefix + "name"] = platform_name
                     for key, value in parser.items(section_name):
-                        dict_key = f"{section_name}.{key}"
-                        self.__config[dict_key] = value
+                        self.__config[section_prefix + key] = value
                         platform_dict[key] = value
 
                     # Check if platform has special firewall configuration
-                    firewall_section = f"{section_name}.enos_firewall"
+                    firewall_section = section_prefix + "enos_firewall"
                     if parser.has_section(firewall_section):
+                        firewall_prefix = f"{firewall_section}."
                         firewall_dict = {}
                         for key, value in parser.items(firewall_section):
-                            dict_key = f"{firewall_section}.{key}"
-                            self.__config[dict_key] = value
+                            self.__config[firewall_prefix + key] = value
                             firewall_dict[key] = value
                         platform_dict["enos_firewall"] = firewall_dict
                     platform_dicts.append(platform_dict)
                 else:
-                    raise ValueError(f"Section {section_name} not found in config file.")
+                    raise ConfigValidationError(
+                        f"Section {section_name} not found in config file.", [(section_name, None)]
+                    )
             self.__config[Key.Platforms.platforms.key] = platform_dicts
         else:
             # Read base section parameters
             if parser.has_section(section_base):
+                prefix = f"{section_base}."
                 for key, value in parser.items(section_base):
-                    dict_key = f"{section_base}.{key}"
+                    dict_key = prefix + key
                     if dict_key not in ignored_keys:
                         self.__config[dict_key] = value
             # Read subclass section parameters
@@ -164,8 +214,9 @@ class Config:
                 subclass_name = subclass[0].lower()
                 section_name = f"{section_base}.{subclass_name}"
                 if parser.has_section(section_name):
+                    section_prefix = f"{section_name}."
                     for key, value in parser.items(section_name):
-                        dict_key = f"{section_name}.{key}"
+                        dict_key = section_prefix + key
                         if dict_key not in ignored_keys:
                             self.__config[dict_key] = value
 
@@ -173,107 +224,101 @@ class Config:
         self.__validate_mandatory_parameters(key_class)
 
     def __validate_mandatory_parameters(self, key_class):
-        def __get_class_attributes(class_name, attr_type=ConfigKey) -> dict:
-            return {
-                pkey: pval for pkey, pval in vars(class_name).items() if isinstance(pval, attr_type)
-            }
-
         # Get class representations of the keys
-        subclasses = [
-            member
-            for member in getmembers(key_class, isclass)
-            if member[1].__module__ == key_class.__module__
-        ]
+        subclasses = _subclasses_of(key_class)
+        section_base = key_class.__name__.lower()
+        # Every missing parameter is collected and reported in a single error
+        missing = []
 
         # Check base class mandatory parameters
-        for key, value in __get_class_attributes(key_class).items():
-            if not value.is_optional and f"{key_class.__name__.lower()}.{key}" not in self.__config:
-                raise ValueError(
-                    f"Mandatory parameter {key} is missing in section {key_class.__name__.lower()}"
-                )
+        for key, value in _mandatory_attrs(key_class):
+            if f"{section_base}.{key}" not in self.__config:
+                missing.append((section_base, key))
 
         # Special handling for platforms section
         if key_class == Key.Platforms and Key.Platforms.platforms.key in self.__config:
             platforms = self.__config[Key.Platforms.platforms.key]
 
             for platform in platforms:
-                for key, value in __get_class_attributes(Key.Platforms.Platform).items():
-                    if not value.is_optional:
-                        if value.kwargs.get("for_types"):
-                            if platform["type"] not in value.kwargs.get("for_types"):
-                                continue
-                        if f"platforms.{platform['name']}.{key}" not in self.__config:
-                            raise ValueError(
-                                f"Mandatory parameter {key} is missing in section {key_class.__name__.lower()}.{platform['name']}"
-                            )
+                for key, value in _mandatory_attrs(Key.Platforms.Platform):
+                    if value.kwargs.get("for_types"):
+                        if platform["type"] not in value.kwargs.get("for_types"):
+                            continue
+                    if f"platforms.{platform['name']}.{key}" not in self.__config:
+                        missing.append((f"{section_base}.{platform['name']}", key))
         else:
             # Check subclass mandatory parameters
             for subclass in subclasses:
-                for key, value in __get_class_attributes(subclass[1]).items():
-                    if (
-                        not value.is_optional
-                        and f"{key_class.__name__.lower()}.{subclass[0].lower()}.{key}"
-                        not in self.__config
-                    ):
-                        raise ValueError(
-                            f"Mandatory parameter {key} is missing in section {key_class.__name__.lower()}.{subclass[0].lower()}"
-                        )
+                section_name = f"{section_base}.{subclass[0].lower()}"
+                for key, value in _mandatory_attrs(subclass[1]):
+                    if f"{section_name}.{key}" not in self.__config:
+                        missing.append((section_name, key))
+
+        if missing:
+            raise ConfigValidationError(
+                "; ".join(
+                    f"Mandatory parameter {key} is missing in section {section}"
+                    for section, key in missing
+                ),
+                missing,
+            )
 
     def get(self, key, default=None):
         return self.__config.get(key, default)
 
-    def get_int(self, key, default=None) -> int:
-        value = self.get(key, default)
+    def __get_required(self, key, default):
+        # Shared by the typed getters, reads the dict directly instead of going through get()
+        value = self.__config.get(key, default)
         if value is None:
             raise ValueError(f"Configuration key '{key}' not found and no default provided")
+        return value
+
+    def get_int(self, key, default=None) -> int:
+        value = self.__get_required(key, default)
         return int(value)
 
     def get_bool(self, key, default=None) -> bool:
-        value = self.get(key, default)
-        if value is None:
-            raise ValueError(f"Configuration key '{key}' not found and no default provided")
+        value = self.__get_required(key, default)
+        # Dict and runtime configs already hold booleans, only ini strings need parsing
+        if isinstance(value, bool):
+            return value
         return str(value).lower() == "true"
 
     def get_float(self, key, default=None) -> float:
-        value = self.get(key, default)
-        if value is None:
-            raise ValueError(f"Configuration key '{key}' not found and no default provided")
+        value = self.__get_required(key, default)
         return float(value)
 
     def get_str(self, key, default=None) -> str:
-        value = self.get(key, default)
-        if value is None:
-            raise ValueError(f"Configuration key '{key}' not found and no default provided")
+        value = self.__get_required(key, default)
         return str(value)
 
     def get_list_str(self, key, default=None):
-        value = self.get(key, default)
-        if value is None:
-            raise ValueError(f"Configuration key '{key}' not found and no default provided")
-        return [str(v) for v in str(value).split()]
+        value = self.__get_required(key, default)
+        return str(value).split()
 
     def get_list_int(self, key, default=None):
-        value = self.get(key, default)
-        if value is None:
-            raise ValueError(f"Configuration key '{key}' not found and no default provided")
-        return [int(v) for v in str(value).split()]
+        value = self.__get_required(key, default)
+        return list(map(int, str(value).split()))
 
     def update_runtime_file(self, create=False):
         try:
             if os.path.exists(self.RUNTIME_PATH):
-                with open(self.RUNTIME_PATH, "r+") as f:
-                    file_config = json.load(f)
-                    file_config.update(self.__config)
-                    f.seek(0)
-                    f.truncate()
-                    json.dump(file_config, f, indent=4)
+                with open(self.RUNTIME_PATH) as f:
+                    runtime_config = json.load(f)
+                runtime_config.update(self.__config)
             elif create:
-                with open(self.RUNTIME_PATH, "w") as f:
-                    json.dump(self.__config, f, indent=4)
+                runtime_config = self.__config
             else:
                 self.__log.error(
                     f"Runtime file {self.RUNTIME_PATH} does not exist. Create flag is set to False."
                 )
+                return
+            # Write a sibling file and rename it over the runtime file, readers never see a
+            # truncated or half written file
+            tmp_path = f"{self.RUNTIME_PATH}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(runtime_config, f, indent=4)
+            os.replace(tmp_path, self.RUNTIME_PATH)
         except Exception as e:
             self.__log.error(f"Error while updating runtime file: {str(e)}")
             raise e
@@ -317,8 +362,9 @@ class Config:
     def __parse_scaling_strategy(self):
         strategy_path = self.get_str(Key.Experiment.Scaling.strategy_path.key)
         try:
-            with open(strategy_path, "r") as file:
-                strategy = yaml.safe_load(file)
+            # The loader decodes the raw bytes itself, skip the text layer
+            with open(strategy_path, "rb") as file:
+                strategy = yaml.load(file, Loader=YAML_LOADER)
                 return strategy
         except FileNotFoundError as e:
             self.__log.error(f"File not found: {strategy_path} - {str(e)}")
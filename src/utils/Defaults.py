@@ -224,6 +224,11 @@ class DefaultKeys:
             fibonacci_value = ConfigKey(
                 "experiment.flink.fibonacci_value", is_optional=False
             )
+            savepoint_reuse_window_s = ConfigKey(
+                "experiment.flink.savepoint_reuse_window_s",
+                is_optional=True,
+                default_value=0,
+            )
 
         class Transscale:
             max_parallelism = ConfigKey(
@@ -13,15 +13,28 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import functools
+import json
 import os
 import subprocess
 from datetime import datetime
 
 import jinja2
+import requests
 import yaml
 
 from src.utils.Logger import Logger
 
+# Use the libyaml C loader when PyYAML was built with it
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+@functools.lru_cache(maxsize=128)
+def _load_template(resource_filename, mtime):
+    # Read and compile each template once, the modification time in the key picks up edits
+    with open(resource_filename, "r") as f:
+        return jinja2.Template(f.read())
+
 
 class FolderManager:
     def __init__(self, log, base_path):
@@ -134,8 +147,6 @@ class Tools:
 
         # Retrieve the dashboard url
         try:
-            import requests
-
             response = requests.get(f"{grafana_cluster_url}/api/search")
             response.raise_for_status()
             dashboards = response.json()
@@ -170,8 +181,6 @@ class Tools:
             "quicklink_remote": q2,
         }
         try:
-            import json
-
             with open(log_file_path, "w") as file:
                 file.write(json.dumps(json_logs, indent=4))
         except Exception as e:
@@ -180,12 +189,11 @@ class Tools:
 
     def load_resource_definition(self, resource_filename, experiment_params):
         try:
-            with open(resource_filename, "r") as f:
-                resource_template = f.read()
-                resource_definition = jinja2.Template(resource_template).render(
-                    experiment_params
-                )
-            resource_object = yaml.safe_load(resource_definition)
+            template = _load_template(
+                resource_filename, os.path.getmtime(resource_filename)
+            )
+            resource_definition = template.render(experiment_params)
+            resource_object = yaml.load(resource_definition, Loader=YAML_LOADER)
             return resource_object
         except FileNotFoundError as e:
             self.__log.error(f"File not found: {resource_filename} - {str(e)}")
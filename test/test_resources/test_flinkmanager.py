@@ -1,12 +1,22 @@
+import copy
+import time
 from unittest.mock import Mock, patch
 
 import pytest
+import requests
+from urllib3.exceptions import MaxRetryError
+from websocket import WebSocketConnectionClosedException
 
 from src.scalehub.resources.FlinkManager import FlinkManager
 from src.scalehub.resources.KubernetesManager import KubernetesManager
 from src.utils.Config import Config
 from src.utils.Logger import Logger
 
+OPERATORS = {
+    "source_test_task": {"id": "vertex_source", "parallelism": 2},
+    "sink_other": {"id": "vertex_sink", "parallelism": 4},
+}
+
 
 class TestFlinkManager:
     """Test suite for the FlinkManager class."""
@@ -16,6 +26,11 @@ class TestFlinkManager:
         """Fixture for a Logger instance."""
         return Mock(spec=Logger)
 
+    @pytest.fixture
+    def operators(self):
+        """Fixture for the operators of a two vertex job plan."""
+        return copy.deepcopy(OPERATORS)
+
     @pytest.fixture
     def config(self):
         """Fixture for a Config instance."""
@@ -38,7 +53,7 @@ class TestFlinkManager:
         """Fixture for a FlinkManager instance."""
         return FlinkManager(logger, config, kubernetes_manager)
 
-    @patch("requests.get")
+    @patch("src.scalehub.resources.FlinkManager._SESSION.get")
     def test_get_overview_success(self, mock_get, flink_manager):
         """Test successful overview retrieval."""
         mock_response = Mock()
@@ -53,7 +68,7 @@ class TestFlinkManager:
             "http://flink-jobmanager.flink.svc.cluster.local:8081/overview"
         )
 
-    @patch("requests.get")
+    @patch("src.scalehub.resources.FlinkManager._SESSION.get")
     def test_get_overview_failure(self, mock_get, flink_manager):
         """Test overview retrieval failure."""
         mock_response = Mock()
@@ -64,10 +79,10 @@ class TestFlinkManager:
 
         assert result is None
 
-    @patch("requests.get")
+    @patch("src.scalehub.resources.FlinkManager._SESSION.get")
     def test_get_overview_exception(self, mock_get, flink_manager):
         """Test overview retrieval with exception."""
-        mock_get.side_effect = Exception("Connection failed")
+        mock_get.side_effect = requests.ConnectionError("Connection failed")
 
         result = flink_manager._FlinkManager__get_overview()
 
@@ -77,7 +92,7 @@ class TestFlinkManager:
         )
 
     @patch("time.sleep")
-    @patch("requests.get")
+    @patch("src.scalehub.resources.FlinkManager._SESSION.get")
     def test_get_job_plan_success(self, mock_get, mock_sleep, flink_manager):
         """Test successful job plan retrieval."""
         mock_response = Mock()
@@ -94,7 +109,7 @@ class TestFlinkManager:
         )
 
     @patch("time.sleep")
-    @patch("requests.get")
+    @patch("src.scalehub.resources.FlinkManager._SESSION.get")
     def test_get_job_plan_retry_failure(self, mock_get, mock_sleep, flink_manager):
         """Test job plan retrieval with retries."""
         mock_response = Mock()
@@ -107,20 +122,42 @@ class TestFlinkManager:
         assert mock_get.call_count == 3
         assert mock_sleep.call_count == 3
 
-    @patch("requests.get")
+    @patch("src.scalehub.resources.FlinkManager._SESSION.get")
     def test_get_job_state_success(self, mock_get, flink_manager):
         """Test successful job state retrieval."""
         flink_manager.job_id = "test_job_id"
         mock_response = Mock()
         mock_response.status_code = 200
-        mock_response.json.return_value = {"status": "RUNNING"}
+        mock_response.json.return_value = {"jid": "test_job_id", "state": "RUNNING"}
         mock_get.return_value = mock_response
 
         result = flink_manager._FlinkManager__get_job_state()
 
         assert result == "RUNNING"
+        mock_get.assert_called_once_with(
+            "http://flink-jobmanager.flink.svc.cluster.local:8081/jobs/test_job_id"
+        )
+
+    @patch("src.scalehub.resources.FlinkManager._SESSION.get")
+    def test_get_job_details_cached(self, mock_get, flink_manager):
+        """Test job details are fetched once for back to back state and plan reads."""
+        flink_manager.job_id = "test_job_id"
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {
+            "jid": "test_job_id",
+            "state": "RUNNING",
+            "plan": {"nodes": [{"id": "vertex_map", "description": "Map", "parallelism": 3}]},
+        }
+        mock_get.return_value = mock_response
+
+        assert flink_manager._FlinkManager__get_job_state() == "RUNNING"
+        assert flink_manager.get_job_info() == 0
+
+        mock_get.assert_called_once()
+        assert flink_manager.operators == {"Map": {"id": "vertex_map", "parallelism": 3}}
 
-    @patch("requests.get")
+    @patch("src.scalehub.resources.FlinkManager._SESSION.get")
     def test_get_job_state_failure(self, mock_get, flink_manager):
         """Test job state retrieval failure."""
         flink_manager.job_id = "test_job_id"
@@ -137,15 +174,18 @@ class TestFlinkManager:
         flink_manager.job_plan = {
             "plan": {
                 "nodes": [
-                    {"description": "Source: test</br>task", "parallelism": 2},
-                    {"description": "Sink: output<br/>task", "parallelism": 4},
+                    {"id": "v1", "description": "Source: test</br>task", "parallelism": 2},
+                    {"id": "v2", "description": "Sink: output<br/>task", "parallelism": 4},
                 ]
             }
         }
 
         result = flink_manager._FlinkManager__get_operators()
 
-        expected = {"Source_test_task": 2, "Sink_output_task": 4}
+        expected = {
+            "Source__testtask": {"id": "v1", "parallelism": 2},
+            "Sink__outputtask": {"id": "v2", "parallelism": 4},
+        }
         assert result == expected
 
     def test_get_operators_exception(self, flink_manager):
@@ -156,109 +196,255 @@ class TestFlinkManager:
 
         assert result is None
 
-    def test_get_monitored_task_parallelism_found(self, flink_manager):
+    def test_get_monitored_task_parallelism_found(self, flink_manager, operators):
         """Test finding monitored task parallelism."""
         flink_manager.monitored_task = "test_task"
-        flink_manager.operators = {"source_test_task": 2, "sink_other": 4}
+        flink_manager._FlinkManager__set_operators(operators)
 
         result = flink_manager._FlinkManager__get_monitored_task_parallelism()
 
         assert result == 2
 
-    def test_get_monitored_task_parallelism_not_found(self, flink_manager):
+    def test_get_monitored_task_parallelism_not_found(self, flink_manager, operators):
         """Test monitored task parallelism not found."""
         flink_manager.monitored_task = "missing_task"
-        flink_manager.operators = {"source_test_task": 2, "sink_other": 4}
+        flink_manager._FlinkManager__set_operators(operators)
 
         result = flink_manager._FlinkManager__get_monitored_task_parallelism()
 
         assert result is None
 
     @patch("time.sleep")
-    def test_stop_job_success(self, mock_sleep, flink_manager):
+    @patch("src.scalehub.resources.FlinkManager._SESSION.get")
+    @patch("src.scalehub.resources.FlinkManager._SESSION.post")
+    def test_stop_job_success(self, mock_post, mock_get, mock_sleep, flink_manager):
         """Test successful job stop with savepoint."""
         flink_manager.job_id = "test_job_id"
-        flink_manager.k.pod_manager.execute_command_on_pod.return_value = (
-            "Savepoint completed. Path: /tmp/savepoint123"
-        )
+        mock_post.return_value = Mock(status_code=202, json=Mock(return_value={"request-id": "t1"}))
+        in_progress = Mock(status_code=200)
+        in_progress.json.return_value = {"status": {"id": "IN_PROGRESS"}}
+        completed = Mock(status_code=200)
+        completed.json.return_value = {
+            "status": {"id": "COMPLETED"},
+            "operation": {"location": "/tmp/savepoint123"},
+        }
+        mock_get.side_effect = [in_progress, completed]
 
-        with patch.object(flink_manager, "_FlinkManager__get_job_state", return_value="RUNNING"):
+        with patch.object(
+            flink_manager, "_FlinkManager__get_job_state", return_value="RUNNING"
+        ), patch.object(flink_manager, "_FlinkManager__wait_for_job_stopped") as mock_wait:
             result = flink_manager._FlinkManager__stop_job()
 
         assert result == "/tmp/savepoint123"
-        flink_manager.k.pod_manager.execute_command_on_pod.assert_called_with(
-            deployment_name="flink-jobmanager", command="flink stop -p -d test_job_id"
+        mock_wait.assert_called_once()
+        # The savepoint is triggered once, retries only poll its status
+        mock_post.assert_called_once_with(
+            "http://flink-jobmanager.flink.svc.cluster.local:8081/jobs/test_job_id/stop",
+            json={"drain": True},
         )
+        mock_get.assert_called_with(
+            "http://flink-jobmanager.flink.svc.cluster.local:8081/jobs/test_job_id/savepoints/t1"
+        )
+        # The savepoint status is polled with a short backoff instead of multi-second sleeps
+        mock_sleep.assert_called_once_with(0.1)
 
     @patch("time.sleep")
-    def test_stop_job_failed_state(self, mock_sleep, flink_manager):
+    @patch("src.scalehub.resources.FlinkManager._SESSION.post")
+    def test_stop_job_failed_state(self, mock_post, mock_sleep, flink_manager):
         """Test job stop when job is in failed state."""
         flink_manager.job_id = "test_job_id"
+        mock_post.return_value = Mock(status_code=202, json=Mock(return_value={"request-id": "t1"}))
 
-        with patch.object(flink_manager, "_FlinkManager__get_job_state", return_value="FAILED"):
+        with patch.object(
+            flink_manager, "_FlinkManager__get_job_state", return_value="FAILED"
+        ), patch.object(flink_manager, "_FlinkManager__get_savepoint") as mock_savepoint:
             result = flink_manager._FlinkManager__stop_job()
 
         assert result is None
+        mock_savepoint.assert_not_called()
 
     @patch("time.sleep")
-    def test_stop_job_no_savepoint(self, mock_sleep, flink_manager):
+    @patch("src.scalehub.resources.FlinkManager._SESSION.get")
+    @patch("src.scalehub.resources.FlinkManager._SESSION.post")
+    def test_stop_job_no_savepoint(self, mock_post, mock_get, mock_sleep, flink_manager):
         """Test job stop when savepoint fails."""
         flink_manager.job_id = "test_job_id"
-        flink_manager.k.pod_manager.execute_command_on_pod.return_value = "No savepoint info"
+        mock_post.return_value = Mock(status_code=202, json=Mock(return_value={"request-id": "t1"}))
+        failed = Mock(status_code=200)
+        failed.json.return_value = {
+            "status": {"id": "COMPLETED"},
+            "operation": {"failure-cause": {"class": "java.lang.Exception"}},
+        }
+        mock_get.return_value = failed
 
         with patch.object(flink_manager, "_FlinkManager__get_job_state", return_value="RUNNING"):
             result = flink_manager._FlinkManager__stop_job()
 
         assert result is None
 
-    def test_build_par_map(self, flink_manager):
+    @patch("time.sleep")
+    def test_wait_for_job_stopped(self, mock_sleep, flink_manager):
+        """Test waiting returns once the job is finished and no job runs."""
+        with patch.object(
+            flink_manager, "_FlinkManager__get_job_state", side_effect=["RUNNING", "FINISHED"]
+        ), patch.object(
+            flink_manager,
+            "_FlinkManager__get_overview",
+            side_effect=[{"jobs-running": 1}, {"jobs-running": 0}],
+        ):
+            result = flink_manager._FlinkManager__wait_for_job_stopped()
+
+        assert result == 0
+        assert mock_sleep.call_count == 2
+
+    @patch("time.sleep")
+    @patch("time.monotonic")
+    def test_wait_for_job_stopped_timeout(self, mock_monotonic, mock_sleep, flink_manager):
+        """Test waiting gives up once the deadline is exceeded."""
+        mock_monotonic.side_effect = [0, 1, 20]
+
+        with patch.object(flink_manager, "_FlinkManager__get_job_state", return_value="RUNNING"):
+            result = flink_manager._FlinkManager__wait_for_job_stopped()
+
+        assert result == 1
+
+    def test_build_par_map(self, flink_manager, operators):
         """Test building parallelism map."""
         flink_manager.monitored_task = "test_task"
-        flink_manager.operators = {"source_test_task": 2, "sink_other": 4}
+        flink_manager._FlinkManager__set_operators(operators)
 
         result = flink_manager._FlinkManager__build_par_map(6)
 
         assert "source_test_task:6" in result
         assert "sink_other:4" in result
+        assert flink_manager.operators == OPERATORS
 
     def test_run_job_simple(self, flink_manager):
         """Test simple job run without parameters."""
-        flink_manager.k.pod_manager.execute_command_on_pod.return_value = "JobID abc123def456"
+        flink_manager.k.pod_manager.execute_command_on_pod.return_value = (
+            "JobID 8e2c3d9ab1f04c7e9a6d5b4c3a2f1e0d"
+        )
 
         result = flink_manager.run_job()
 
-        assert flink_manager.job_id == "abc123def456"
+        assert flink_manager.job_id == "8e2c3d9ab1f04c7e9a6d5b4c3a2f1e0d"
         flink_manager.k.pod_manager.execute_command_on_pod.assert_called_with(
             deployment_name="flink-jobmanager",
             command="flink run -d -j /tmp/jobs/test_job.jar",
+            persistent=True,
         )
 
     def test_run_job_with_start_par(self, flink_manager):
         """Test job run with start parallelism."""
-        flink_manager.k.pod_manager.execute_command_on_pod.return_value = "JobID abc123def456"
+        flink_manager.k.pod_manager.execute_command_on_pod.return_value = (
+            "JobID 8e2c3d9ab1f04c7e9a6d5b4c3a2f1e0d"
+        )
 
         result = flink_manager.run_job(start_par=4)
 
-        assert flink_manager.job_id == "abc123def456"
+        assert flink_manager.job_id == "8e2c3d9ab1f04c7e9a6d5b4c3a2f1e0d"
         flink_manager.k.pod_manager.execute_command_on_pod.assert_called_with(
             deployment_name="flink-jobmanager",
             command="flink run -d -j /tmp/jobs/test_job.jar --start_par 4",
+            persistent=True,
         )
 
-    def test_run_job_with_rescale(self, flink_manager):
+    def test_run_job_with_rescale(self, flink_manager, operators):
         """Test job run with rescaling."""
         flink_manager.monitored_task = "test_task"
-        flink_manager.operators = {"source_test_task": 2, "sink_other": 4}
-        flink_manager.k.pod_manager.execute_command_on_pod.return_value = "JobID abc123def456"
+        flink_manager._FlinkManager__set_operators(operators)
+        flink_manager.k.pod_manager.execute_command_on_pod.return_value = (
+            "JobID 8e2c3d9ab1f04c7e9a6d5b4c3a2f1e0d"
+        )
 
         with patch.object(flink_manager, "_FlinkManager__stop_job", return_value="/tmp/savepoint"):
             result = flink_manager.run_job(new_parallelism=6)
 
-        assert flink_manager.job_id == "abc123def456"
+        assert flink_manager.job_id == "8e2c3d9ab1f04c7e9a6d5b4c3a2f1e0d"
         expected_command = "flink run -d -s /tmp/savepoint -j /tmp/jobs/test_job.jar --parmap 'source_test_task:6;sink_other:4'"
         flink_manager.k.pod_manager.execute_command_on_pod.assert_called_with(
-            deployment_name="flink-jobmanager", command=expected_command
+            deployment_name="flink-jobmanager", command=expected_command, persistent=True
+        )
+        assert flink_manager.operators["source_test_task"]["parallelism"] == 6
+        assert flink_manager.operators["sink_other"]["parallelism"] == 4
+
+    def test_run_job_rescales_every_monitored_operator(self, flink_manager, operators):
+        """Test every operator matching the monitored task is rescaled."""
+        operators["map_test_task"] = {"id": "vertex_map", "parallelism": 2}
+        flink_manager.monitored_task = "test_task"
+        flink_manager._FlinkManager__set_operators(operators)
+        flink_manager.k.pod_manager.execute_command_on_pod.return_value = (
+            "JobID 8e2c3d9ab1f04c7e9a6d5b4c3a2f1e0d"
+        )
+
+        with patch.object(flink_manager, "_FlinkManager__stop_job", return_value="/tmp/savepoint"):
+            flink_manager.run_job(new_parallelism=6)
+
+        _, kwargs = flink_manager.k.pod_manager.execute_command_on_pod.call_args
+        assert "'source_test_task:6;sink_other:4;map_test_task:6'" in kwargs["command"]
+        assert flink_manager.operators["source_test_task"]["parallelism"] == 6
+        assert flink_manager.operators["map_test_task"]["parallelism"] == 6
+        assert flink_manager.operators["sink_other"]["parallelism"] == 4
+
+    def test_run_job_with_rescale_failure_keeps_operators(self, flink_manager, operators):
+        """Test a failed rescale leaves the tracked operator parallelism untouched."""
+        flink_manager.monitored_task = "test_task"
+        flink_manager._FlinkManager__set_operators(operators)
+        flink_manager.k.pod_manager.execute_command_on_pod.return_value = "No job ID in response"
+
+        with patch.object(flink_manager, "_FlinkManager__stop_job", return_value="/tmp/savepoint"):
+            result = flink_manager.run_job(new_parallelism=6)
+
+        assert result == 1
+        assert flink_manager.operators == OPERATORS
+
+    def test_run_job_reuses_recent_savepoint(self, flink_manager, operators):
+        """Test rescaling within the reuse window cancels the job instead of stopping it."""
+        flink_manager.job_id = "old_job_id"
+        flink_manager.monitored_task = "test_task"
+        flink_manager._FlinkManager__set_operators(operators)
+        flink_manager.savepoint_reuse_window_s = 60
+        flink_manager._FlinkManager__last_savepoint = ("/tmp/recent_savepoint", time.monotonic())
+        flink_manager._FlinkManager__restored_from = "/tmp/recent_savepoint"
+        flink_manager.k.pod_manager.execute_command_on_pod.return_value = (
+            "JobID 8e2c3d9ab1f04c7e9a6d5b4c3a2f1e0d"
+        )
+
+        with patch.object(flink_manager, "_FlinkManager__stop_job") as mock_stop, patch.object(
+            flink_manager, "_FlinkManager__wait_for_job_stopped"
+        ), patch.object(flink_manager, "_FlinkManager__get_source_records", return_value=0):
+            flink_manager.run_job(new_parallelism=6)
+
+        mock_stop.assert_not_called()
+        flink_manager.k.pod_manager.execute_command_on_pod.assert_any_call(
+            deployment_name="flink-jobmanager",
+            command="flink cancel old_job_id",
+            persistent=True,
         )
+        assert flink_manager.savepoint_path == "/tmp/recent_savepoint"
+
+    def test_run_job_progressed_since_savepoint(self, flink_manager, operators):
+        """Test rescaling takes a new savepoint once the job emitted records since the last one."""
+        flink_manager.job_id = "old_job_id"
+        flink_manager.monitored_task = "test_task"
+        flink_manager._FlinkManager__set_operators(operators)
+        flink_manager.savepoint_reuse_window_s = 60
+        flink_manager._FlinkManager__last_savepoint = ("/tmp/recent_savepoint", time.monotonic())
+        flink_manager._FlinkManager__restored_from = "/tmp/recent_savepoint"
+        flink_manager.k.pod_manager.execute_command_on_pod.return_value = (
+            "JobID 8e2c3d9ab1f04c7e9a6d5b4c3a2f1e0d"
+        )
+
+        with patch.object(
+            flink_manager, "_FlinkManager__stop_job", return_value="/tmp/new_savepoint"
+        ) as mock_stop, patch.object(
+            flink_manager, "_FlinkManager__get_source_records", return_value=1200
+        ):
+            flink_manager.run_job(new_parallelism=6)
+
+        mock_stop.assert_called_once()
+        assert flink_manager.savepoint_path == "/tmp/new_savepoint"
+        assert flink_manager._FlinkManager__restored_from == "/tmp/new_savepoint"
 
     def test_run_job_no_job_id_found(self, flink_manager):
         """Test job run when job ID extraction fails."""
@@ -268,6 +454,22 @@ class TestFlinkManager:
 
         assert result == 1
 
+    def test_run_job_exec_error(self, flink_manager):
+        """Test a websocket error raised by the exec call is reported as a failed run."""
+        flink_manager.k.pod_manager.execute_command_on_pod.side_effect = (
+            WebSocketConnectionClosedException("closed")
+        )
+
+        assert flink_manager.run_job() == 1
+
+    def test_run_job_api_retries_exhausted(self, flink_manager):
+        """Test running out of API retries is reported as a failed run."""
+        flink_manager.k.pod_manager.execute_command_on_pod.side_effect = MaxRetryError(
+            None, "/api/v1/pods", "Max retries exceeded"
+        )
+
+        assert flink_manager.run_job() == 1
+
     def test_get_total_slots(self, flink_manager):
         """Test getting total slots."""
         with patch.object(
@@ -292,16 +494,24 @@ class TestFlinkManager:
 
     def test_check_nominal_job_run(self, flink_manager):
         """Test checking nominal job run."""
-        flink_manager.job_id = "current_job_123"
+        flink_manager.job_id = "c0ffee00c0ffee00c0ffee00c0ffee00"
         flink_manager.k.pod_manager.execute_command_on_pod.side_effect = [
-            "Job1 abc123def456\nJob2 xyz789uvw012\nJob3 current_job_123",
-            "Job abc123def456 cancelled",
-            "Job xyz789uvw012 cancelled",
+            "17.10.2026 10:00:00 : 0a1b2c3d4e5f60718293a4b5c6d7e8f9 : Job1 (RUNNING)\n"
+            "17.10.2026 10:00:01 : f9e8d7c6b5a40392817f6e5d4c3b2a10 : Job2 (RUNNING)\n"
+            "17.10.2026 10:00:02 : c0ffee00c0ffee00c0ffee00c0ffee00 : Job3 (RUNNING)",
+            "Job 0a1b2c3d4e5f60718293a4b5c6d7e8f9 cancelled",
+            "Job f9e8d7c6b5a40392817f6e5d4c3b2a10 cancelled",
         ]
 
         result = flink_manager.check_nominal_job_run()
 
         assert result == 0
+        flink_manager.k.pod_manager.execute_command_on_pod.assert_any_call(
+            deployment_name="flink-jobmanager",
+            command="flink cancel f9e8d7c6b5a40392817f6e5d4c3b2a10",
+            persistent=True,
+        )
+        assert flink_manager.k.pod_manager.execute_command_on_pod.call_count == 3
 
     @patch("time.sleep")
     def test_wait_for_job_running_success(self, mock_sleep, flink_manager):
@@ -320,16 +530,29 @@ class TestFlinkManager:
         assert result == 1
         assert mock_sleep.call_count == 15
 
+    @patch("time.sleep")
+    def test_wait_for_job_running_failed(self, mock_sleep, flink_manager):
+        """Test waiting for a failed job returns without exhausting retries."""
+        with patch.object(
+            flink_manager, "_FlinkManager__get_job_state", return_value="FAILED"
+        ), patch.object(flink_manager, "_FlinkManager__get_root_exception", return_value="boom"):
+            result = flink_manager.wait_for_job_running()
+
+        assert result == 1
+        mock_sleep.assert_not_called()
+
     def test_get_job_info_success(self, flink_manager):
         """Test successful job info retrieval."""
         flink_manager.job_id = "test_job_id"
 
         with patch.object(
             flink_manager,
-            "_FlinkManager__get_job_plan",
-            return_value={"plan": {"nodes": []}},
+            "_FlinkManager__get_job_details",
+            return_value={"state": "RUNNING", "plan": {"nodes": []}},
         ), patch.object(
-            flink_manager, "_FlinkManager__get_operators", return_value={"task": 2}
+            flink_manager,
+            "_FlinkManager__get_operators",
+            return_value={"task": {"id": "v1", "parallelism": 2}},
         ), patch.object(
             flink_manager,
             "_FlinkManager__get_monitored_task_parallelism",
@@ -338,9 +561,22 @@ class TestFlinkManager:
             result = flink_manager.get_job_info()
 
         assert result == 0
-        assert flink_manager.operators == {"task": 2}
+        assert flink_manager.operators == {"task": {"id": "v1", "parallelism": 2}}
         assert flink_manager.monitored_task_parallelism == 2
 
+    def test_get_job_info_malformed_plan(self, flink_manager):
+        """Test a plan string that is not valid JSON is reported instead of raised."""
+        flink_manager.job_id = "test_job_id"
+
+        with patch.object(
+            flink_manager,
+            "_FlinkManager__get_job_details",
+            return_value={"state": "RUNNING", "plan": "{not json"},
+        ):
+            result = flink_manager.get_job_info()
+
+        assert result is None
+
     def test_get_job_info_no_job_id(self, flink_manager):
         """Test job info retrieval without job ID."""
         flink_manager.job_id = None
@@ -354,10 +590,14 @@ class TestFlinkManager:
         flink_manager.job_id = "test_job_id"
 
         with patch.object(
+            flink_manager, "_FlinkManager__get_job_details", return_value=None
+        ), patch.object(
             flink_manager,
             "_FlinkManager__get_job_plan",
             return_value={"plan": {"nodes": []}},
-        ), patch.object(flink_manager, "_FlinkManager__get_operators", return_value=None):
+        ), patch.object(
+            flink_manager, "_FlinkManager__get_operators", return_value=None
+        ):
             result = flink_manager.get_job_info()
 
         assert result is None
@@ -0,0 +1,988 @@
+import functools
+import threading
+from unittest.mock import MagicMock, Mock, patch
+
+import pytest
+from kubernetes import client
+from kubernetes.client.rest import ApiException
+from kubernetes.stream.stream import _websocket_request
+from websocket import WebSocketConnectionClosedException
+
+from src.scalehub.resources.KubernetesManager import (
+    API_TIMEOUT,
+    DeploymentManager,
+    JobManager,
+    KubernetesManager,
+    NodeManager,
+    PodManager,
+    ServiceManager,
+    StatefulSetManager,
+    _parse_label_selector,
+)
+from src.utils.Logger import Logger
+
+
+class TestKubernetesManager:
+    """Test suite for the KubernetesManager class."""
+
+    @patch("src.scalehub.resources.KubernetesManager.kubeconfig")
+    def test_managers_share_api_client(self, mock_kubeconfig):
+        """Test every manager issues its requests through the single pooled client."""
+        k = KubernetesManager(Mock(spec=Logger))
+
+        managers = [
+            k.pod_manager,
+            k.deployment_manager,
+            k.service_manager,
+            k.job_manager,
+            k.node_manager,
+            k.statefulset_manager,
+        ]
+        assert all(m.api_instance.api_client is k.api_client for m in managers)
+        assert k.job_manager.core_api.api_client is k.api_client
+        assert k.api_client.configuration.connection_pool_maxsize >= 64
+        assert k.api_client.default_headers["Accept-Encoding"] == "gzip"
+        assert k.api_client.configuration.keep_alive is True
+        assert 503 in k.api_client.configuration.retries.status_forcelist
+
+    @patch("src.scalehub.resources.KubernetesManager.stream")
+    @patch("src.scalehub.resources.KubernetesManager.kubeconfig")
+    def test_pod_exec_off_shared_client(self, mock_kubeconfig, mock_stream):
+        """Test pod execs use a client of their own built from the shared configuration."""
+        k = KubernetesManager(Mock(spec=Logger))
+        pod = MagicMock()
+        pod.metadata.name = "flink-jobmanager-abc"
+        k.pod_manager.api_instance.list_namespaced_pod = Mock(return_value=Mock(items=[pod]))
+
+        k.pod_manager.execute_command_on_pod(
+            "flink-jobmanager", "flink list", namespace="flink", label_selector="app=flink"
+        )
+
+        exec_client = mock_stream.call_args.args[0].__self__.api_client
+        assert exec_client is not k.api_client
+        assert exec_client.configuration is k.api_client.configuration
+
+    @patch("src.scalehub.resources.KubernetesManager.kubeconfig")
+    def test_get_configmap_cached(self, mock_kubeconfig):
+        """Test a ConfigMap is read once within the TTL and again once it expires."""
+        k = KubernetesManager(Mock(spec=Logger))
+        core_api = MagicMock()
+        core_api.read_namespaced_config_map.return_value.data = {"key": "value"}
+        k._KubernetesManager__core_api = core_api
+
+        with patch(
+            "src.scalehub.resources.KubernetesManager.monotonic", side_effect=[0, 0, 100, 100]
+        ):
+            assert k.get_configmap("transscale-job-definition") == {"key": "value"}
+            assert k.get_configmap("transscale-job-definition") == {"key": "value"}
+            assert k.get_configmap("transscale-job-definition") == {"key": "value"}
+
+        assert core_api.read_namespaced_config_map.call_count == 2
+
+    @patch.dict("os.environ", {"KUBECONFIG": "/tmp/kubeconfig"}, clear=True)
+    @patch("src.scalehub.resources.KubernetesManager.kubeconfig")
+    def test_load_kubeconfig_from_env(self, mock_kubeconfig):
+        """Test KUBECONFIG is used without trying the in-cluster config."""
+        KubernetesManager(Mock(spec=Logger))
+
+        mock_kubeconfig.load_kube_config.assert_called_once_with("/tmp/kubeconfig")
+        mock_kubeconfig.load_incluster_config.assert_not_called()
+
+    @patch.dict("os.environ", {"KUBERNETES_SERVICE_HOST": "10.0.0.1"}, clear=True)
+    @patch("src.scalehub.resources.KubernetesManager.kubeconfig")
+    def test_load_kubeconfig_in_cluster(self, mock_kubeconfig):
+        """Test the in-cluster config is loaded directly when KUBECONFIG is unset."""
+        KubernetesManager(Mock(spec=Logger))
+
+        mock_kubeconfig.load_kube_config.assert_not_called()
+        mock_kubeconfig.load_incluster_config.assert_called_once()
+
+    @patch.dict("os.environ", {}, clear=True)
+    @patch("src.scalehub.resources.KubernetesManager.kubeconfig")
+    def test_load_kubeconfig_missing(self, mock_kubeconfig):
+        """Test a missing configuration is reported without trying to load anything."""
+        logger = Mock(spec=Logger)
+
+        KubernetesManager(logger)
+
+        mock_kubeconfig.load_kube_config.assert_not_called()
+        mock_kubeconfig.load_incluster_config.assert_not_called()
+        logger.error.assert_called_once()
+
+
+def _concurrent_exec_stream(api_client, execs, swapped):
+    """The real stream() over a fake websocket transport that holds each exec until `execs` of
+    them are in flight, recording whether call_api of the shared client was swapped meanwhile."""
+    barrier = threading.Barrier(execs, timeout=5)
+
+    def websocket_call(configuration, method, url, **kwargs):
+        barrier.wait()
+        swapped.append("call_api" in vars(api_client))
+        barrier.wait()
+        return url.split("?", 1)[0].split("/")[-2]
+
+    return functools.partial(_websocket_request, websocket_call, None)
+
+
+class TestPodManager:
+    """Test suite for the PodManager class."""
+
+    @pytest.fixture
+    def logger(self):
+        """Fixture for a Logger instance."""
+        return Mock(spec=Logger)
+
+    @pytest.fixture
+    def pod_manager(self, logger):
+        """Fixture for a PodManager instance with a mocked CoreV1Api."""
+        manager = PodManager(logger)
+        manager.api_instance = MagicMock()
+        pod = MagicMock()
+        pod.metadata.name = "flink-jobmanager-abc"
+        pod.metadata.namespace = "flink"
+        manager.api_instance.list_pod_for_all_namespaces.return_value.items = [pod]
+        manager.api_instance.list_pod_for_all_namespaces.return_value.metadata._continue = None
+        manager.api_instance.list_namespaced_pod.return_value.metadata._continue = None
+        manager.apps_api = MagicMock()
+        manager.apps_api.list_deployment_for_all_namespaces.return_value.items = []
+        return manager
+
+    def test_target_pod_from_deployment_selector(self, pod_manager):
+        """Test pods of a deployment are listed through its selector in its namespace."""
+        deployment = MagicMock()
+        deployment.metadata.namespace = "flink"
+        deployment.spec.selector.match_labels = {"app": "flink", "component": "jobmanager"}
+        pod_manager.apps_api.list_deployment_for_all_namespaces.return_value.items = [deployment]
+        pod = MagicMock()
+        pod_manager.api_instance.list_namespaced_pod.return_value.items = [pod]
+
+        assert pod_manager._PodManager__get_target_pod("flink-jobmanager") is pod
+        assert pod_manager._PodManager__get_target_pod("flink-jobmanager") is pod
+
+        pod_manager.apps_api.list_deployment_for_all_namespaces.assert_called_once_with(
+            field_selector="metadata.name=flink-jobmanager", _request_timeout=API_TIMEOUT
+        )
+        pod_manager.api_instance.list_namespaced_pod.assert_called_with(
+            "flink",
+            label_selector="app=flink,component=jobmanager",
+            field_selector="status.phase=Running",
+            limit=1,
+            _request_timeout=API_TIMEOUT,
+        )
+        pod_manager.api_instance.list_pod_for_all_namespaces.assert_not_called()
+
+    @patch("src.scalehub.resources.KubernetesManager.stream")
+    def test_target_pod_from_caller_selector(self, mock_stream, pod_manager):
+        """Test a caller supplied namespace and selector skip the deployment lookup."""
+        pod = MagicMock()
+        pod.metadata.name = "flink-jobmanager-abc"
+        pod.metadata.namespace = "flink"
+        pod_manager.api_instance.list_namespaced_pod.return_value.items = [pod]
+        mock_stream.return_value = "ok"
+
+        result = pod_manager.execute_command_on_pod(
+            "flink-jobmanager", "flink list", namespace="flink", label_selector="app=flink"
+        )
+
+        assert result == "ok"
+        pod_manager.apps_api.list_deployment_for_all_namespaces.assert_not_called()
+        pod_manager.api_instance.list_namespaced_pod.assert_called_once_with(
+            "flink",
+            label_selector="app=flink",
+            field_selector="status.phase=Running",
+            limit=1,
+            _request_timeout=API_TIMEOUT,
+        )
+
+    @patch("src.scalehub.resources.KubernetesManager.stream")
+    def test_target_pod_cached(self, mock_stream, pod_manager):
+        """Test consecutive execs on a deployment look its pod up once."""
+        mock_stream.return_value = "ok"
+
+        pod_manager.execute_command_on_pod("flink-jobmanager", "flink list")
+        pod_manager.execute_command_on_pod("flink-jobmanager", "flink list")
+
+        pod_manager.api_instance.list_pod_for_all_namespaces.assert_called_once()
+        assert mock_stream.call_count == 2
+
+    @patch("src.scalehub.resources.KubernetesManager.stream")
+    def test_target_pod_cache_invalidated(self, mock_stream, pod_manager):
+        """Test an exec failing on a cached pod is retried once on a new lookup."""
+        mock_stream.side_effect = ["ok", ApiException(status=404), "retried"]
+
+        pod_manager.execute_command_on_pod("flink-jobmanager", "flink list")
+        result = pod_manager.execute_command_on_pod("flink-jobmanager", "flink list")
+
+        assert result == "retried"
+        assert pod_manager.api_instance.list_pod_for_all_namespaces.call_count == 2
+
+    def test_concurrent_execs_keep_shared_client(self, logger):
+        """Test concurrent execs never swap call_api on the client shared with REST calls."""
+        api_client = client.ApiClient(client.Configuration())
+        manager = PodManager(logger, api_client)
+        swapped = []
+        pods = []
+        for i in range(2):
+            pod = MagicMock()
+            pod.metadata.name = f"flink-taskmanager-{i}"
+            pod.metadata.namespace = "flink"
+            pods.append(pod)
+        manager.api_instance.list_namespaced_pod = Mock(
+            side_effect=lambda *a, **kw: Mock(items=[pods.pop()])
+        )
+        results = []
+
+        with patch(
+            "src.scalehub.resources.KubernetesManager.stream",
+            _concurrent_exec_stream(api_client, 2, swapped),
+        ):
+            threads = [
+                threading.Thread(
+                    target=lambda name=name: results.append(
+                        manager.execute_command_on_pod(
+                            name, "date", namespace="flink", label_selector=f"app={name}"
+                        )
+                    )
+                )
+                for name in ("taskmanager-0", "taskmanager-1")
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        assert sorted(results) == ["flink-taskmanager-0", "flink-taskmanager-1"]
+        assert swapped == [False, False]
+        assert "call_api" not in vars(api_client)
+
+    def test_target_pod_paged_scan(self, pod_manager):
+        """Test names that are not deployments are found with a paged scan."""
+        first_page, second_page = MagicMock(), MagicMock()
+        first_page.items = []
+        first_page.metadata._continue = "token"
+        pod = MagicMock()
+        pod.metadata.name = "flink-taskmanager-s-0"
+        second_page.items = [pod]
+        pod_manager.api_instance.list_pod_for_all_namespaces.side_effect = [first_page, second_page]
+
+        assert pod_manager._PodManager__get_target_pod("flink-taskmanager-s") is pod
+        pod_manager.api_instance.list_pod_for_all_namespaces.assert_called_with(
+            limit=500, _continue="token", _request_timeout=API_TIMEOUT
+        )
+
+    @pytest.fixture
+    def shell(self):
+        """Fixture for an open persistent shell."""
+        mock_shell = MagicMock()
+        mock_shell.is_open.return_value = True
+        mock_shell.peek_stdout.return_value = True
+        return mock_shell
+
+    def test_get_logs_since(self, pod_manager):
+        """Test pod logs are read for every pod and joined in pod order."""
+        pods = [MagicMock(), MagicMock()]
+        pods[0].metadata.name = "pod-a"
+        pods[1].metadata.name = "pod-b"
+        pod_manager.api_instance.list_namespaced_pod.return_value.items = pods
+        pod_manager.api_instance.read_namespaced_pod_log.side_effect = lambda name, *a, **kw: Mock(
+            stream=Mock(return_value=iter([name.encode()[:3], name.encode()[3:]]))
+        )
+
+        result = pod_manager.get_logs_since("app=monitor", 60, "default")
+
+        assert result == "pod-a\npod-b"
+        assert pod_manager.api_instance.read_namespaced_pod_log.call_count == 2
+        _, kwargs = pod_manager.api_instance.read_namespaced_pod_log.call_args
+        assert kwargs == {
+            "_preload_content": False,
+            "_request_timeout": API_TIMEOUT,
+            "since_seconds": 60,
+        }
+
+    def test_is_pod_ready_cached_read(self, pod_manager):
+        """Test pod readiness is read from the API server cache."""
+        pod = MagicMock()
+        pod.status.phase = "Running"
+        condition = MagicMock(type="Ready", status="True")
+        pod.status.conditions = [condition]
+        pod_manager.api_instance.list_namespaced_pod.return_value.items = [pod]
+
+        assert pod_manager.is_pod_ready("flink-jobmanager-abc", "flink") is True
+        pod_manager.api_instance.list_namespaced_pod.assert_called_once_with(
+            "flink",
+            field_selector="metadata.name=flink-jobmanager-abc,status.phase=Running",
+            resource_version="0",
+            _request_timeout=API_TIMEOUT,
+        )
+
+    def test_is_pod_ready_missing_pod(self, pod_manager):
+        """Test a pod missing from the cache is reported as not ready."""
+        pod_manager.api_instance.list_namespaced_pod.return_value.items = []
+
+        assert pod_manager.is_pod_ready("flink-jobmanager-abc", "flink") is False
+
+    @patch("src.scalehub.resources.KubernetesManager.stream")
+    def test_execute_command_on_pods_by_label_persistent(self, mock_stream, pod_manager):
+        """Test repeated persistent broadcasts reuse one shell per pod."""
+        pods = [MagicMock(), MagicMock()]
+        for i, pod in enumerate(pods):
+            pod.metadata.name = f"flink-taskmanager-{i}"
+        pod_manager.api_instance.list_namespaced_pod.return_value.items = pods
+        pod_manager.api_instance.list_pod_for_all_namespaces.return_value.items = pods
+
+        with patch.object(pod_manager, "execute_command_in_shell", return_value="ok"):
+            for _ in range(3):
+                result = pod_manager.execute_command_on_pods_by_label(
+                    "app=flink", "date", "flink", persistent=True
+                )
+
+        assert result == ["ok", "ok"]
+        assert mock_stream.call_count == 2
+        pod_manager.api_instance.list_pod_for_all_namespaces.assert_not_called()
+
+    def test_persistent_broadcast_keeps_shared_client(self, logger):
+        """Test shells opened by a broadcast never swap call_api on the shared client."""
+        api_client = client.ApiClient(client.Configuration())
+        manager = PodManager(logger, api_client)
+        pods = []
+        for i in range(2):
+            pod = MagicMock()
+            pod.metadata.name = f"flink-taskmanager-{i}"
+            pod.metadata.namespace = "flink"
+            pods.append(pod)
+        manager.api_instance.list_namespaced_pod = Mock(
+            return_value=Mock(items=pods, metadata=Mock(_continue=None))
+        )
+        swapped = []
+
+        with patch(
+            "src.scalehub.resources.KubernetesManager.stream",
+            _concurrent_exec_stream(api_client, 2, swapped),
+        ), patch.object(manager, "execute_command_in_shell", return_value="ok"):
+            result = manager.execute_command_on_pods_by_label(
+                "app=flink", "date", "flink", persistent=True
+            )
+
+        assert result == ["ok", "ok"]
+        assert swapped == [False, False]
+        assert "call_api" not in vars(api_client)
+
+    def test_concurrent_broadcast_restores_call_api(self, logger):
+        """Test two concurrent execs of a broadcast leave call_api of the shared client as is."""
+        api_client = client.ApiClient(client.Configuration())
+        call_api = api_client.call_api
+        manager = PodManager(logger, api_client)
+        pods = []
+        for i in range(2):
+            pod = MagicMock()
+            pod.metadata.name = f"flink-taskmanager-{i}"
+            pod.metadata.namespace = "flink"
+            pods.append(pod)
+        manager.api_instance.list_namespaced_pod = Mock(
+            return_value=Mock(items=pods, metadata=Mock(_continue=None))
+        )
+        swapped = []
+
+        with patch(
+            "src.scalehub.resources.KubernetesManager.stream",
+            _concurrent_exec_stream(api_client, 2, swapped),
+        ):
+            result = manager.execute_command_on_pods_by_label("app=flink", "date", "flink")
+
+        assert result == ["flink-taskmanager-0", "flink-taskmanager-1"]
+        assert swapped == [False, False]
+        assert api_client.call_api == call_api
+
+    @patch("src.scalehub.resources.KubernetesManager.stream")
+    def test_execute_command_on_pods_by_label(self, mock_stream, pod_manager):
+        """Test one-shot broadcasts exec on the listed pods without looking them up again."""
+        pods = [MagicMock(), MagicMock()]
+        for i, pod in enumerate(pods):
+            pod.metadata.name = f"flink-taskmanager-{i}"
+            pod.metadata.namespace = "flink"
+        pod_manager.api_instance.list_namespaced_pod.return_value.items = pods
+        mock_stream.side_effect = lambda *a, name, **kw: name
+
+        result = pod_manager.execute_command_on_pods_by_label("app=flink", "date", "flink")
+
+        assert result == ["flink-taskmanager-0", "flink-taskmanager-1"]
+        pod_manager.api_instance.list_namespaced_pod.assert_called_once()
+        pod_manager.api_instance.list_pod_for_all_namespaces.assert_not_called()
+        pod_manager.apps_api.list_deployment_for_all_namespaces.assert_not_called()
+
+    def test_delete_pods_by_label(self, pod_manager):
+        """Test every labelled pod is deleted."""
+        pods = [MagicMock(), MagicMock()]
+        for i, pod in enumerate(pods):
+            pod.metadata.name = f"pod-{i}"
+            pod.metadata.namespace = "flink"
+        pod_manager.api_instance.list_namespaced_pod.return_value.items = pods
+
+        pod_manager.delete_pods_by_label("app=flink", "flink")
+
+        deleted = {c.args for c in pod_manager.api_instance.delete_namespaced_pod.call_args_list}
+        assert deleted == {("pod-0", "flink"), ("pod-1", "flink")}
+
+    def test_delete_pods_by_label_paged(self, pod_manager):
+        """Test pods on every page of the listing are deleted."""
+        pages = [MagicMock(), MagicMock()]
+        for i, page in enumerate(pages):
+            pod = MagicMock()
+            pod.metadata.name = f"pod-{i}"
+            pod.metadata.namespace = "flink"
+            page.items = [pod]
+        pages[0].metadata._continue = "token"
+        pages[1].metadata._continue = None
+        pod_manager.api_instance.list_namespaced_pod.side_effect = pages
+
+        pod_manager.delete_pods_by_label("app=flink", "flink")
+
+        assert pod_manager.api_instance.delete_namespaced_pod.call_count == 2
+        pod_manager.api_instance.list_namespaced_pod.assert_called_with(
+            "flink",
+            limit=500,
+            _continue="token",
+            _request_timeout=API_TIMEOUT,
+            label_selector="app=flink",
+        )
+
+    def test_delete_pods_by_label_error(self, pod_manager):
+        """Test an API error raised by a concurrent delete is propagated."""
+        pod = MagicMock()
+        pod_manager.api_instance.list_namespaced_pod.return_value.items = [pod]
+        pod_manager.api_instance.delete_namespaced_pod.side_effect = ApiException(status=404)
+
+        with pytest.raises(ApiException):
+            pod_manager.delete_pods_by_label("app=flink", "flink")
+
+    @patch("uuid.uuid4")
+    def test_execute_command_in_shell(self, mock_uuid, pod_manager, shell):
+        """Test command output is read up to the end marker."""
+        mock_uuid.return_value.hex = "abc"
+        shell.read_stdout.side_effect = [
+            "Job has been submitted ",
+            "with JobID 123\n__SCALEHUB_END_abc__\n",
+        ]
+
+        result = pod_manager.execute_command_in_shell(shell, "flink list")
+
+        assert result == "Job has been submitted with JobID 123\n"
+        shell.write_stdin.assert_called_once_with(
+            "{ flink list\n} 2>&1; echo __SCALEHUB_END_abc__\n"
+        )
+
+    def test_execute_command_in_closed_shell(self, pod_manager, shell):
+        """Test a closed shell returns no output."""
+        shell.is_open.return_value = False
+
+        assert pod_manager.execute_command_in_shell(shell, "flink list") is None
+
+    @patch("src.scalehub.resources.KubernetesManager.stream")
+    def test_persistent_shell_is_reused(self, mock_stream, pod_manager, shell):
+        """Test consecutive persistent commands share a single shell."""
+        mock_stream.return_value = shell
+
+        with patch.object(pod_manager, "execute_command_in_shell", return_value="ok"):
+            pod_manager.execute_command_on_pod("flink-jobmanager", "flink list", persistent=True)
+            pod_manager.execute_command_on_pod("flink-jobmanager", "flink list", persistent=True)
+
+        mock_stream.assert_called_once()
+
+    @patch("src.scalehub.resources.KubernetesManager.stream")
+    def test_persistent_shell_fallback(self, mock_stream, pod_manager):
+        """Test a shell that cannot be opened falls back to a one-shot exec."""
+        mock_stream.side_effect = [ApiException(status=500), "one-shot output"]
+
+        result = pod_manager.execute_command_on_pod(
+            "flink-jobmanager", "flink list", persistent=True
+        )
+
+        assert result == "one-shot output"
+
+    @patch("src.scalehub.resources.KubernetesManager.stream")
+    def test_persistent_shell_sent_command_not_rerun(self, mock_stream, pod_manager, shell):
+        """Test a command sent to the shell is not run again when its output is lost."""
+        mock_stream.return_value = shell
+
+        with patch.object(pod_manager, "execute_command_in_shell", return_value=None):
+            result = pod_manager.execute_command_on_pod(
+                "flink-jobmanager", "flink cancel 123", persistent=True
+            )
+
+        assert result is None
+        mock_stream.assert_called_once()
+        shell.close.assert_called_once()
+
+    @patch("src.scalehub.resources.KubernetesManager.stream")
+    def test_persistent_shell_read_failure(self, mock_stream, pod_manager, shell):
+        """Test a connection dropped after the write is not retried with a one-shot exec."""
+        mock_stream.return_value = shell
+        shell.update.side_effect = WebSocketConnectionClosedException("closed")
+
+        result = pod_manager.execute_command_on_pod(
+            "flink-jobmanager", "flink cancel 123", persistent=True
+        )
+
+        assert result is None
+        mock_stream.assert_called_once()
+
+    @patch("src.scalehub.resources.KubernetesManager.stream")
+    def test_persistent_shell_closed_connection(self, mock_stream, pod_manager, shell):
+        """Test a dropped websocket connection is treated as a broken shell."""
+        mock_stream.side_effect = [shell, "one-shot output"]
+        shell.write_stdin.side_effect = WebSocketConnectionClosedException("closed")
+
+        result = pod_manager.execute_command_on_pod(
+            "flink-jobmanager", "flink list", persistent=True
+        )
+
+        assert result == "one-shot output"
+
+    @patch("src.scalehub.resources.KubernetesManager.stream")
+    def test_persistent_shell_after_pod_deleted(self, mock_stream, pod_manager, shell):
+        """Test closing the shells drops their pods, a new shell opens on the replacement pod."""
+        new_pod = MagicMock()
+        new_pod.metadata.name = "flink-jobmanager-def"
+        new_pod.metadata.namespace = "flink"
+        mock_stream.return_value = shell
+
+        with patch.object(pod_manager, "execute_command_in_shell", return_value="ok"):
+            pod_manager.execute_command_on_pod("flink-jobmanager", "flink list", persistent=True)
+            pod_manager.close_persistent_shells()
+            pod_manager.api_instance.list_pod_for_all_namespaces.return_value.items = [new_pod]
+            pod_manager.execute_command_on_pod("flink-jobmanager", "flink list", persistent=True)
+
+        assert mock_stream.call_args.kwargs["name"] == "flink-jobmanager-def"
+        assert pod_manager.api_instance.list_pod_for_all_namespaces.call_count == 2
+
+
+class _StopInformer(BaseException):
+    """Raised by test doubles to leave an informer loop."""
+
+
+def _statefulset_event(name, ready_replicas, namespace="flink"):
+    statefulset = MagicMock()
+    statefulset.metadata.name = name
+    statefulset.metadata.namespace = namespace
+    statefulset.status.ready_replicas = ready_replicas
+    return {"type": "MODIFIED", "object": statefulset}
+
+
+def _deployment_event(replicas, ready_replicas):
+    deployment = MagicMock()
+    deployment.status.replicas = replicas
+    deployment.status.ready_replicas = ready_replicas
+    return {"type": "MODIFIED", "object": deployment}
+
+
+class TestDeploymentManager:
+    """Test suite for the DeploymentManager class."""
+
+    @pytest.fixture
+    def deployment_manager(self):
+        """Fixture for a DeploymentManager instance with a mocked AppsV1Api."""
+        manager = DeploymentManager(Mock(spec=Logger))
+        manager.api_instance = MagicMock()
+        return manager
+
+    def test_scale_deployment_single_patch(self, deployment_manager):
+        """Test scaling patches the deployment by name without reading it first."""
+        deployment_manager.scale_deployment("flink-taskmanager", 2, "flink")
+
+        deployment_manager.api_instance.read_namespaced_deployment.assert_not_called()
+        deployment_manager.api_instance.patch_namespaced_deployment.assert_called_once_with(
+            name="flink-taskmanager",
+            namespace="flink",
+            body={"spec": {"replicas": 2}},
+            _request_timeout=API_TIMEOUT,
+        )
+
+    @patch("src.scalehub.resources.KubernetesManager.watch.Watch")
+    def test_wait_for_replicas(self, mock_watch, deployment_manager):
+        """Test waiting returns once the deployment reports the requested replicas."""
+        mock_watch.return_value.stream.return_value = iter(
+            [_deployment_event(2, 1), _deployment_event(1, None), _deployment_event(None, None)]
+        )
+
+        assert deployment_manager.wait_for_replicas("flink-taskmanager", 0, "flink") is True
+        _, kwargs = mock_watch.return_value.stream.call_args
+        assert kwargs["field_selector"] == "metadata.name=flink-taskmanager"
+        mock_watch.return_value.stop.assert_called_once()
+
+    @patch("src.scalehub.resources.KubernetesManager.watch.Watch")
+    def test_wait_for_replicas_timeout(self, mock_watch, deployment_manager):
+        """Test waiting reports failure when the watch ends first."""
+        mock_watch.return_value.stream.return_value = iter([_deployment_event(1, 1)])
+
+        assert deployment_manager.wait_for_replicas("flink-taskmanager", 0, "flink") is False
+
+
+class TestJobManager:
+    """Test suite for the JobManager class."""
+
+    def test_get_job_logs(self):
+        """Test the logs of every job pod are streamed and joined in pod order."""
+        job_manager = JobManager(Mock(spec=Logger))
+        job_manager.core_api = MagicMock()
+        pods = [MagicMock(), MagicMock()]
+        pods[0].metadata.name = "transscale-job-a"
+        pods[1].metadata.name = "transscale-job-b"
+        job_manager.core_api.list_namespaced_pod.return_value.items = pods
+        job_manager.core_api.list_namespaced_pod.return_value.metadata._continue = None
+        job_manager.core_api.read_namespaced_pod_log.side_effect = lambda name, *a, **kw: Mock(
+            stream=Mock(return_value=iter([name.encode()]))
+        )
+
+        result = job_manager.get_job_logs("transscale-job", "default")
+
+        assert result == "transscale-job-a\ntransscale-job-b"
+        for call in job_manager.core_api.read_namespaced_pod_log.call_args_list:
+            assert call.kwargs["_preload_content"] is False
+
+
+SERVICE = {
+    "apiVersion": "v1",
+    "kind": "Service",
+    "metadata": {"name": "flink-jobmanager-rest", "namespace": "flink"},
+}
+
+
+class TestServiceManager:
+    """Test suite for the ServiceManager class."""
+
+    @pytest.fixture
+    def service_manager(self):
+        """Fixture for a ServiceManager instance with a mocked CoreV1Api and template."""
+        manager = ServiceManager(Mock(spec=Logger))
+        manager.api_instance = MagicMock()
+        manager.t = Mock(load_resource_definition=Mock(return_value=SERVICE))
+        return manager
+
+    def test_create_service_server_side_apply(self, service_manager):
+        """Test a service is created or updated with one server-side apply request."""
+        service_manager.create_service_from_template("service.yaml.j2", {}, "flink")
+
+        service_manager.api_instance.patch_namespaced_service.assert_called_once_with(
+            name="flink-jobmanager-rest",
+            namespace="flink",
+            body=SERVICE,
+            field_manager="scalehub",
+            force=True,
+            _content_type="application/apply-patch+yaml",
+            _request_timeout=API_TIMEOUT,
+        )
+        service_manager.api_instance.read_namespaced_service.assert_not_called()
+        service_manager.api_instance.create_namespaced_service.assert_not_called()
+
+    def test_delete_missing_service(self, service_manager):
+        """Test deleting a missing service is reported without a preflight read."""
+        service_manager.api_instance.delete_namespaced_service.side_effect = ApiException(
+            status=404
+        )
+
+        assert service_manager.delete_service_from_template("service.yaml.j2", {}) is None
+        service_manager.api_instance.read_namespaced_service.assert_not_called()
+
+
+class TestStatefulSetManager:
+    """Test suite for the StatefulSetManager class."""
+
+    @pytest.fixture
+    def logger(self):
+        """Fixture for a Logger instance."""
+        return Mock(spec=Logger)
+
+    @pytest.fixture
+    def statefulset_manager(self, logger):
+        """Fixture for a StatefulSetManager instance with a mocked AppsV1Api."""
+        manager = StatefulSetManager(logger)
+        manager.api_instance = MagicMock()
+        return manager
+
+    @staticmethod
+    def _feed(statefulset_manager, events):
+        """Deliver events to the readiness registry in place of its background watch."""
+        readiness = statefulset_manager.readiness
+        return patch.object(
+            readiness,
+            "_StatefulSetReadiness__ensure_watch",
+            side_effect=lambda namespace: [readiness.apply_event(e) for e in events],
+        )
+
+    @patch("src.scalehub.resources.KubernetesManager.sleep")
+    @patch("src.scalehub.resources.KubernetesManager.watch.Watch")
+    def test_readiness_watch_survives_errors(self, mock_watch, mock_sleep, statefulset_manager):
+        """Test the watch restarts after non API errors and is released when its thread exits."""
+        readiness = statefulset_manager.readiness
+        readiness._StatefulSetReadiness__watches["flink"] = Mock()
+        mock_watch.return_value.stream.side_effect = ConnectionResetError("reset")
+        mock_sleep.side_effect = [None, _StopInformer]
+
+        with pytest.raises(_StopInformer):
+            readiness._StatefulSetReadiness__run_watch("flink")
+
+        assert mock_watch.return_value.stream.call_count == 2
+        assert "flink" not in readiness._StatefulSetReadiness__watches
+
+    def test_scale_statefulset_waits_on_watch(self, statefulset_manager):
+        """Test scaling returns once the watched statefulset reports its ready replicas."""
+        events = [
+            _statefulset_event("flink-taskmanager-s", 1),
+            _statefulset_event("flink-taskmanager-s", 3),
+        ]
+        with self._feed(statefulset_manager, events):
+            result = statefulset_manager.scale_statefulset("flink-taskmanager-s", 3, "flink")
+
+        assert result is True
+        statefulset_manager.api_instance.patch_namespaced_stateful_set.assert_called_once_with(
+            name="flink-taskmanager-s",
+            namespace="flink",
+            body={"spec": {"replicas": 3}},
+            _request_timeout=API_TIMEOUT,
+        )
+
+    def test_readiness_wait_timeout(self, statefulset_manager):
+        """Test waiting reports failure when the target is not reached in time."""
+        events = [_statefulset_event("flink-taskmanager-s", 1)]
+        with self._feed(statefulset_manager, events):
+            result = statefulset_manager.readiness.wait(
+                "flink", {"flink-taskmanager-s": 3}, timeout=0.05
+            )
+
+        assert result is False
+
+    def test_readiness_wakes_waiter(self, statefulset_manager):
+        """Test an event published after registration releases a waiting caller."""
+        readiness = statefulset_manager.readiness
+        with patch.object(readiness, "_StatefulSetReadiness__ensure_watch"):
+            timer = threading.Timer(
+                0.05, readiness.apply_event, args=(_statefulset_event("tm-a", 2),)
+            )
+            timer.start()
+            assert readiness.wait("flink", {"tm-a": 2}, timeout=5) is True
+
+    def test_reset_taskmanagers_single_watch(self, statefulset_manager):
+        """Test all taskmanagers are scaled down before waiting on the shared watch."""
+        statefulsets = [_statefulset_event(name, 2)["object"] for name in ("tm-a", "tm-b")]
+        statefulset_manager.api_instance.list_namespaced_stateful_set.return_value.items = (
+            statefulsets
+        )
+        events = [
+            _statefulset_event("tm-a", 0),
+            _statefulset_event("tm-b", 1),
+            _statefulset_event("tm-b", 0),
+        ]
+        with self._feed(statefulset_manager, events) as ensure_watch:
+            assert statefulset_manager.reset_taskmanagers() is True
+
+        assert statefulset_manager.api_instance.patch_namespaced_stateful_set.call_count == 2
+        ensure_watch.assert_called_once_with("flink")
+
+    def test_get_count_of_taskmanagers_raw(self, statefulset_manager):
+        """Test taskmanager replicas are read from the raw list response."""
+        statefulset_manager.api_instance.list_namespaced_stateful_set.return_value.data = (
+            b'{"items": [{"metadata": {"name": "tm-a"}, "spec": {"replicas": 2}},'
+            b' {"metadata": {"name": "tm-b"}, "spec": {"replicas": 0}}]}'
+        )
+
+        assert statefulset_manager.get_count_of_taskmanagers() == {"tm-a": 2, "tm-b": 0}
+        _, kwargs = statefulset_manager.api_instance.list_namespaced_stateful_set.call_args
+        assert kwargs["_preload_content"] is False
+
+    def test_reset_taskmanagers_list_error(self, statefulset_manager):
+        """Test a failed taskmanager listing is reported instead of raising."""
+        statefulset_manager.api_instance.list_namespaced_stateful_set.side_effect = ApiException(
+            status=500
+        )
+
+        assert statefulset_manager.reset_taskmanagers() is False
+        assert statefulset_manager.get_count_of_taskmanagers() is None
+        statefulset_manager.api_instance.patch_namespaced_stateful_set.assert_not_called()
+
+
+def _node(name, labels, resource_version="1"):
+    node = MagicMock()
+    node.metadata.name = name
+    node.metadata.labels = labels
+    node.metadata.resource_version = resource_version
+    return node
+
+
+class TestNodeManager:
+    """Test suite for the NodeManager class."""
+
+    @pytest.fixture
+    def logger(self):
+        """Fixture for a Logger instance."""
+        return Mock(spec=Logger)
+
+    @pytest.fixture
+    def node_manager(self, logger):
+        """Fixture for a NodeManager instance with a synced node cache."""
+        manager = NodeManager(logger)
+        manager.api_instance = MagicMock()
+        manager._NodeManager__informer = Mock()
+        manager._NodeManager__node_cache = {
+            "node-1": _node("node-1", {"node-role.kubernetes.io/scaling": "SCHEDULABLE"}),
+            "node-2": _node("node-2", {"node-role.kubernetes.io/scaling": "UNSCHEDULABLE"}),
+        }
+        manager._NodeManager__node_cache_synced.set()
+        return manager
+
+    def test_parse_label_selector(self):
+        """Test equality selectors are parsed and other expressions are rejected."""
+        assert _parse_label_selector("a=1,b==2,c!=3") == (
+            ("a", "1", True),
+            ("b", "2", True),
+            ("c", "3", False),
+        )
+        assert _parse_label_selector("a in (1,2)") is None
+
+    def test_node_list_from_cache(self, node_manager):
+        """Test equality selectors are resolved from the node cache."""
+        nodes = node_manager.node_list("node-role.kubernetes.io/scaling=SCHEDULABLE")
+
+        assert [node.metadata.name for node in nodes] == ["node-1"]
+        node_manager.api_instance.list_node.assert_not_called()
+
+    def test_node_list_unsupported_selector(self, node_manager):
+        """Test selectors the cache cannot evaluate are sent to the API server as a quorum read."""
+        node_manager.api_instance.list_node.return_value.items = ["node-2"]
+
+        assert node_manager.node_list("env in (prod)") == ["node-2"]
+        node_manager.api_instance.list_node.assert_called_once_with(
+            label_selector="env in (prod)", _request_timeout=API_TIMEOUT
+        )
+
+    def test_get_next_node(self, node_manager):
+        """Test the next node skips schedulable and full nodes through the selector."""
+        node_manager._NodeManager__node_cache = {
+            "node-1": _node("node-1", {"node-role.kubernetes.io/tnode": "pico"}),
+            "node-2": _node("node-2", {"node-role.kubernetes.io/tnode": "pico"}),
+        }
+        for name in ("node-1", "node-2"):
+            node_manager._NodeManager__node_cache[name].metadata.labels[
+                "node-role.kubernetes.io/worker"
+            ] = "consumer"
+        node_manager._NodeManager__node_cache["node-1"].metadata.labels[
+            "node-role.kubernetes.io/state"
+        ] = "FULL"
+
+        assert node_manager.get_next_node("pico") == "node-2"
+        node_manager.api_instance.list_node.assert_not_called()
+
+    def test_get_available_worker_nodes(self, node_manager):
+        """Test worker nodes are counted per matching key=value label."""
+        nodes = [
+            _node(
+                "node-1",
+                {
+                    "node-role.kubernetes.io/worker": "consumer",
+                    "node-role.kubernetes.io/tnode": "pico",
+                },
+            ),
+            _node("node-2", {"node-role.kubernetes.io/worker": "consumer"}),
+        ]
+        node_manager._NodeManager__node_cache = {node.metadata.name: node for node in nodes}
+        node_manager._NodeManager__node_cache["node-3"] = _node(
+            "node-3", {"node-role.kubernetes.io/tnode": "pico"}
+        )
+
+        counts = node_manager.get_available_worker_nodes()
+
+        assert counts == {
+            "node-role.kubernetes.io/worker=consumer": 2,
+            "node-role.kubernetes.io/tnode=pico": 1,
+        }
+        node_manager.api_instance.list_node.assert_not_called()
+
+    def test_node_events_update_cache(self, node_manager):
+        """Test watch events are applied to the node cache."""
+        node_manager._NodeManager__apply_node_event(
+            {"type": "DELETED", "object": _node("node-1", {})}
+        )
+        node_manager._NodeManager__apply_node_event(
+            {
+                "type": "ADDED",
+                "object": _node("node-3", {"node-role.kubernetes.io/scaling": "SCHEDULABLE"}),
+            }
+        )
+
+        nodes = node_manager.get_schedulable_nodes()
+
+        assert [node.metadata.name for node in nodes] == ["node-3"]
+
+    def test_stale_node_event_ignored(self, node_manager):
+        """Test a late event does not overwrite a newer node written through by mark_node."""
+        node_manager.api_instance.patch_node.return_value = _node(
+            "node-2", {"node-role.kubernetes.io/scaling": "SCHEDULABLE"}, resource_version="7"
+        )
+        node_manager.mark_node_as_schedulable("node-2")
+
+        node_manager._NodeManager__apply_node_event(
+            {
+                "type": "MODIFIED",
+                "object": _node(
+                    "node-2", {"node-role.kubernetes.io/scaling": "UNSCHEDULABLE"}, "6"
+                ),
+            }
+        )
+
+        nodes = node_manager.get_schedulable_nodes()
+        assert sorted(node.metadata.name for node in nodes) == ["node-1", "node-2"]
+
+    @patch("src.scalehub.resources.KubernetesManager.sleep")
+    def test_node_watch_error_falls_back_to_api(self, mock_sleep, node_manager):
+        """Test a non API error keeps the informer alive and sends lookups to the API server."""
+        mock_sleep.side_effect = _StopInformer
+        node_manager.api_instance.list_node.side_effect = ConnectionResetError("reset")
+
+        with pytest.raises(_StopInformer):
+            node_manager._NodeManager__run_informer()
+
+        assert not node_manager._NodeManager__node_cache_synced.is_set()
+        node_manager.api_instance.list_node.side_effect = None
+        node_manager.api_instance.list_node.return_value.items = []
+        assert node_manager.get_schedulable_nodes() == []
+        node_manager.api_instance.list_node.assert_called_with(
+            label_selector="node-role.kubernetes.io/scaling=SCHEDULABLE",
+            _request_timeout=API_TIMEOUT,
+        )
+
+    def test_mark_node_writes_through(self, node_manager):
+        """Test a marked node is visible in the cache before its watch event arrives."""
+        node_manager.api_instance.patch_node.return_value = _node(
+            "node-2", {"node-role.kubernetes.io/scaling": "SCHEDULABLE"}
+        )
+
+        node_manager.mark_node_as_schedulable("node-2")
+
+        nodes = node_manager.get_schedulable_nodes()
+        assert sorted(node.metadata.name for node in nodes) == ["node-1", "node-2"]
+        node_manager.api_instance.read_node.assert_not_called()
+        node_manager.api_instance.patch_node.assert_called_once_with(
+            "node-2",
+            body=[
+                {
+                    "op": "add",
+                    "path": "/metadata/labels/node-role.kubernetes.io~1scaling",
+                    "value": "SCHEDULABLE",
+                }
+            ],
+            _content_type="application/json-patch+json",
+            _request_timeout=API_TIMEOUT,
+        )
+
+    def test_reset_scaling_labels(self, node_manager):
+        """Test every schedulable node is patched back to unschedulable."""
+        node_manager.api_instance.patch_node.side_effect = lambda name, body, **kw: _node(
+            name, {"node-role.kubernetes.io/scaling": body[0]["value"]}
+        )
+
+        node_manager.reset_scaling_labels()
+
+        node_manager.api_instance.patch_node.assert_called_once()
+        args, kwargs = node_manager.api_instance.patch_node.call_args
+        assert args == ("node-1",)
+        assert kwargs["body"][0]["value"] == "UNSCHEDULABLE"
+        assert node_manager.get_schedulable_nodes() == []
@@ -1,11 +1,49 @@
 import json
-from unittest.mock import patch, mock_open
+from unittest.mock import Mock, patch, mock_open
 
 import pytest
 
-from src.utils.Config import Config
+from src.utils import Config as config_module
+from src.utils.Config import Config, ConfigValidationError
 from src.utils.Logger import Logger
 
+DEFAULTS_CONTENT = """[scalehub]
+inventory = default_inventory
+playbook = default_playbook
+experiments = default_experiments
+debug_level = 0
+
+[experiment]
+name = default_name
+job_file = default_job
+task_name = default_task
+output_skip_s = 0
+output_stats = false
+output_plot = false
+broker_mqtt_host = localhost
+broker_mqtt_port = 1883
+kafka_partitions = 1
+unchained_tasks = false
+type = default
+runs = 1
+
+[experiment.flink]
+checkpoint_interval_ms = 5000
+window_size_ms = 10000
+fibonacci_value = 20
+
+[experiment.generators]
+generators = gen1
+
+[experiment.generators.gen1]
+type = sensor
+topic = test_topic
+num_sensors = 10
+interval_ms = 1000
+replicas = 1
+value = 42
+"""
+
 
 class TestConfig:
     """Test suite for the Config class."""
@@ -15,6 +53,11 @@ class TestConfig:
         """Fixture for a Logger instance."""
         return Logger()
 
+    @pytest.fixture(autouse=True)
+    def clear_defaults_cache(self):
+        """Fixture clearing the defaults shared between Config instances."""
+        config_module._DEFAULTS_CACHE.clear()
+
     @pytest.fixture
     def config_dict(self):
         """Fixture for a sample configuration dictionary."""
@@ -53,44 +96,6 @@ class TestConfig:
 
     def test_load_from_ini_file(self, logger):
         """Test Config loads correctly from an INI file."""
-        # Mock the defaults file content with all required sections
-        defaults_content = """[scalehub]
-inventory = default_inventory
-playbook = default_playbook
-experiments = default_experiments
-debug_level = 0
-
-[experiment]
-name = default_name
-job_file = default_job
-task_name = default_task
-output_skip_s = 0
-output_stats = false
-output_plot = false
-broker_mqtt_host = localhost
-broker_mqtt_port = 1883
-kafka_partitions = 1
-unchained_tasks = false
-type = default
-runs = 1
-
-[experiment.flink]
-checkpoint_interval_ms = 5000
-window_size_ms = 10000
-fibonacci_value = 20
-
-[experiment.generators]
-generators = gen1
-
-[experiment.generators.gen1]
-type = sensor
-topic = test_topic
-num_sensors = 10
-interval_ms = 1000
-replicas = 1
-value = 42
-"""
-
         # Test file content
         ini_content = """[scalehub]
 inventory = inventory_value
@@ -103,7 +108,7 @@ runs = 5
 
         def mock_open_side_effect(filename, *args, **kwargs):
             if filename == "/app/conf/defaults.ini":
-                return mock_open(read_data=defaults_content).return_value
+                return mock_open(read_data=DEFAULTS_CONTENT).return_value
             else:
                 return mock_open(read_data=ini_content).return_value
 
@@ -114,6 +119,67 @@ runs = 5
                 assert config.get_int("experiment.runs") == 5
                 assert config.get_str("experiment.name") == "test_experiment"
 
+    def test_defaults_read_once(self, logger):
+        """Test the defaults file is parsed once and shared by later Config instances."""
+        ini_content = "[scalehub]\ninventory = inventory_value\n"
+        opened = []
+
+        def mock_open_side_effect(filename, *args, **kwargs):
+            opened.append(filename)
+            content = DEFAULTS_CONTENT if filename == Config.DEFAULTS_PATH else ini_content
+            return mock_open(read_data=content).return_value
+
+        with patch("builtins.open", side_effect=mock_open_side_effect):
+            with patch("os.path.exists", return_value=True):
+                first = Config(logger, "config.ini")
+                second = Config(logger, "config.ini")
+
+        assert opened.count(Config.DEFAULTS_PATH) == 1
+        assert second.get("scalehub.playbook") == "default_playbook"
+        generators = first.get("experiment.generators")
+        generators[0]["replicas"] = 3
+        assert second.get("experiment.generators")[0]["replicas"] == 1
+
+    def test_defaults_reread_when_modified(self, logger):
+        """Test the shared defaults are parsed again once the defaults file changes."""
+        opened = []
+
+        def mock_open_side_effect(filename, *args, **kwargs):
+            opened.append(filename)
+            content = DEFAULTS_CONTENT if filename == Config.DEFAULTS_PATH else "[scalehub]\n"
+            return mock_open(read_data=content).return_value
+
+        with patch("builtins.open", side_effect=mock_open_side_effect):
+            with patch("os.path.exists", return_value=True):
+                with patch("os.stat", return_value=Mock(st_mtime_ns=1)):
+                    Config(logger, "config.ini")
+                    Config(logger, "config.ini")
+                with patch("os.stat", return_value=Mock(st_mtime_ns=2)):
+                    Config(logger, "config.ini")
+
+        assert opened.count(Config.DEFAULTS_PATH) == 2
+
+    def test_missing_mandatory_parameters(self, logger):
+        """Test every missing mandatory parameter is reported in a single error."""
+        generators_content = DEFAULTS_CONTENT[DEFAULTS_CONTENT.index("[experiment.generators]") :]
+
+        def mock_open_side_effect(filename, *args, **kwargs):
+            if filename == Config.DEFAULTS_PATH:
+                return mock_open(read_data=generators_content).return_value
+            return mock_open(read_data="[scalehub]\ninventory = inventory_value\n").return_value
+
+        with patch("builtins.open", side_effect=mock_open_side_effect):
+            with patch("os.path.exists", return_value=True):
+                with pytest.raises(ConfigValidationError) as error:
+                    Config(logger, "config.ini")
+
+        assert error.value.missing == [
+            ("scalehub", "playbook"),
+            ("scalehub", "experiments"),
+            ("scalehub", "debug_level"),
+        ]
+        assert isinstance(error.value, ValueError)
+
     def test_get_methods(self, logger, config_dict):
         """Test utility methods for retrieving configuration values."""
         config = Config(logger, config_dict)
@@ -121,6 +187,18 @@ runs = 5
         assert config.get_int("key2") == 42
         assert config.get_bool("key3") is True
         assert config.get_str("key1") == "value1"
+        assert config.get_bool("missing", default=False) is False
+        flags = Config(logger, {"flag": "TRUE", "other": "1"})
+        assert flags.get_bool("flag") is True
+        assert flags.get_bool("other") is False
+
+    def test_get_list_methods(self, logger):
+        """Test whitespace separated values are split into typed lists."""
+        config = Config(logger, {"cpu_values": "1 2  4", "names": "a b"})
+        assert config.get_list_int("cpu_values") == [1, 2, 4]
+        assert config.get_list_str("names") == ["a", "b"]
+        with pytest.raises(ValueError, match="not found"):
+            config.get_list_int("missing")
 
     def test_update_runtime_file(self, logger, config_dict):
         """Test updating the runtime file."""
@@ -130,12 +208,31 @@ runs = 5
             with patch("json.load", return_value={"existing_key": "existing_value"}):
                 with patch("json.dump") as mock_dump:
                     with patch("builtins.open", mock_open()) as mock_file:
-                        config.update_runtime_file()
+                        with patch("os.replace") as mock_replace:
+                            config.update_runtime_file()
                         # Verify json.dump was called with merged data
                         mock_dump.assert_called_once()
                         dumped_data = mock_dump.call_args[0][0]
                         assert "existing_key" in dumped_data
                         assert dumped_data["key1"] == "value1"
+                        mock_replace.assert_called_once_with(
+                            f"{Config.RUNTIME_PATH}.tmp", Config.RUNTIME_PATH
+                        )
+
+    def test_update_runtime_file_atomic(self, logger, config_dict, tmp_path):
+        """Test the runtime file is replaced by a rename and keeps existing keys."""
+        runtime_path = tmp_path / "runtime.json"
+        runtime_path.write_text(json.dumps({"existing_key": "existing_value", "key1": "old"}))
+        config = Config(logger, config_dict)
+
+        with patch.object(Config, "RUNTIME_PATH", str(runtime_path)):
+            config.update_runtime_file()
+
+        assert json.loads(runtime_path.read_text()) == {
+            "existing_key": "existing_value",
+            **config_dict,
+        }
+        assert not (tmp_path / "runtime.json.tmp").exists()
 
     def test_delete_runtime_file(self, logger):
         """Test deleting the runtime file."""
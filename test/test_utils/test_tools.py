@@ -3,7 +3,7 @@ from unittest.mock import patch, mock_open, MagicMock
 import pytest
 
 from src.utils.Logger import Logger
-from src.utils.Tools import FolderManager, Tools
+from src.utils.Tools import FolderManager, Tools, _load_template
 
 
 class TestFolderManager:
@@ -110,8 +110,33 @@ class TestTools:
         """Test loading a resource definition."""
         resource_content = "key: {{ value }}"
         rendered_content = "key: test_value"
+        _load_template.cache_clear()
         with patch("builtins.open", mock_open(read_data=resource_content)), patch(
             "jinja2.Template.render", return_value=rendered_content
-        ), patch("yaml.safe_load", return_value={"key": "test_value"}):
+        ), patch("os.path.getmtime", return_value=1.0):
             result = tools.load_resource_definition("resource.yaml", {"value": "test_value"})
             assert result == {"key": "test_value"}
+
+    def test_load_resource_definition_cached(self, tools):
+        """Test a template file is read once and rendered on every load."""
+        _load_template.cache_clear()
+        with patch("builtins.open", mock_open(read_data="key: {{ value }}")) as mock_file, patch(
+            "os.path.getmtime", return_value=1.0
+        ):
+            first = tools.load_resource_definition("resource.yaml", {"value": "a"})
+            second = tools.load_resource_definition("resource.yaml", {"value": "b"})
+
+        assert first == {"key": "a"}
+        assert second == {"key": "b"}
+        mock_file.assert_called_once_with("resource.yaml", "r")
+
+    def test_load_resource_definition_modified(self, tools):
+        """Test a template file is read again once it has been modified."""
+        _load_template.cache_clear()
+        with patch("builtins.open", mock_open(read_data="key: {{ value }}")) as mock_file, patch(
+            "os.path.getmtime", side_effect=[1.0, 2.0]
+        ):
+            tools.load_resource_definition("resource.yaml", {"value": "a"})
+            tools.load_resource_definition("resource.yaml", {"value": "b"})
+
+        assert mock_file.call_count == 2